@@ -0,0 +1,110 @@
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from netplanner import NetPlanner
+from serializer import Serializer
+from profiler import StageProfiler
+
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = [path for path in sorted(glob.glob(pattern, recursive=True)) if os.path.isfile(path)]
+        else:
+            matches = [pattern]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def evaluate_project(path, paths_limit=100, dispersion_mode='max', profile=False):
+    # profile: add per-stage times and counters to the result
+    profiler = StageProfiler() if profile else None
+    try:
+        planner = NetPlanner.from_project_data(Serializer.load(path), profiler)
+        tasks_expected, dispersion = planner.calc_t_exp()
+        t_cr, t_early, t_task_early_start, t_task_early_end, t_late, \
+            t_task_late_start, t_task_late_end, task_full_time_reserve, task_independent_time_reserve, \
+            task_private_time_reserve_1, task_private_time_reserve_2 = planner.calc_determ_net_params()
+        events_dispersion, probabilities = planner.calc_probabilistic_net_params(dispersion_mode)
+        result = {
+            'file': path,
+            'status': 'ok',
+            't_cr': float(t_cr),
+            'events': {
+                't_early': t_early.tolist(),
+                't_late': t_late.tolist(),
+                'dispersion': events_dispersion.tolist(),
+                'probabilities': probabilities.tolist()
+            },
+            'tasks': {
+                'expected': tasks_expected.tolist(),
+                'dispersion': dispersion.tolist(),
+                'early_start': t_task_early_start.tolist(),
+                'early_end': t_task_early_end.tolist(),
+                'late_start': t_task_late_start.tolist(),
+                'late_end': t_task_late_end.tolist(),
+                'full_reserve': task_full_time_reserve.tolist(),
+                'private_reserve_1': task_private_time_reserve_1.tolist(),
+                'private_reserve_2': task_private_time_reserve_2.tolist(),
+                'independent_reserve': task_independent_time_reserve.tolist()
+            },
+            'paths': planner.calc_full_path_reserves(paths_limit)
+        }
+        if profiler is not None:
+            result['profile'] = profiler.as_dict()
+        return result
+    except Exception as e:
+        return {'file': path, 'status': 'error', 'error': str(e)}
+
+
+def _evaluate_project_args(args):
+    return evaluate_project(*args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Calculate saved projects without the GUI, '
+                                                 'one JSON line per project')
+    parser.add_argument('paths', nargs='+', help='project files or glob patterns')
+    parser.add_argument('-o', '--output', help='write results to this file instead of stdout')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--paths-limit', type=int, default=100, help='near-critical paths reported per project')
+    parser.add_argument('--dispersion-mode', choices=['max', 'critical', 'clark'], default='max')
+    parser.add_argument('--profile', action='store_true', help='add per-stage times and counters')
+    args = parser.parse_args(argv)
+
+    paths = expand_paths(args.paths)
+    jobs = [(path, args.paths_limit, args.dispersion_mode, args.profile) for path in paths]
+    try:
+        output = open(args.output, 'w') if args.output else sys.stdout
+    except OSError:
+        # Reported like the projects that fail, on stderr as there is no output
+        print(json.dumps({'file': args.output, 'status': 'error', 'error': 'File not found'}), file=sys.stderr)
+        return 1
+    failed = 0
+    executor = None
+    try:
+        if args.jobs > 1 and len(jobs) > 1:
+            executor = ProcessPoolExecutor(min(args.jobs, len(jobs)))
+            results = executor.map(_evaluate_project_args, jobs, chunksize=max(1, len(jobs) // (args.jobs * 4)))
+        else:
+            results = map(_evaluate_project_args, jobs)
+        for result in results:
+            failed += result['status'] != 'ok'
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failed or not paths else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netgen import NETWORKS, generate_planner
+from montecarlo import MonteCarloSimulator
+from distengine import DistributionEngine
+
+
+def errors(events_probabilities, reference):
+    difference = np.abs(events_probabilities - reference)
+    return difference.max(), difference.mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Discretized distributions against Monte Carlo: time and '
+                                                 'events probabilities error to a large Monte Carlo reference')
+    parser.add_argument('--network', choices=list(NETWORKS), default='layered')
+    parser.add_argument('--events', type=int, default=300)
+    parser.add_argument('--resolutions', type=int, nargs='+', default=[8, 16, 32])
+    parser.add_argument('--scenarios', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--reference-scenarios', type=int, default=400000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    planner = generate_planner(args.network, args.events, args.seed)
+    print('tasks: %d, events: %d' % (planner.tasks_count, planner.events_count))
+    reference = MonteCarloSimulator(planner).run(args.reference_scenarios, args.seed + 1).events_probabilities
+
+    print('%-24s %10s %12s %12s' % ('method', 'time, s', 'max error', 'mean error'))
+    for resolution in args.resolutions:
+        started = time.perf_counter()
+        result = DistributionEngine(planner, resolution).run()
+        elapsed = time.perf_counter() - started
+        print('%-24s %10.3f %12.4f %12.4f' % ('distributions/%d' % resolution, elapsed,
+                                              *errors(result.events_probabilities, reference)))
+    for scenarios in args.scenarios:
+        started = time.perf_counter()
+        result = MonteCarloSimulator(planner).run(scenarios, args.seed)
+        elapsed = time.perf_counter() - started
+        print('%-24s %10.3f %12.4f %12.4f' % ('monte carlo/%d' % scenarios, elapsed,
+                                              *errors(result.events_probabilities, reference)))
+
+
+if __name__ == '__main__':
+    main()
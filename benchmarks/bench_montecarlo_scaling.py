@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netgen import NETWORKS, generate_planner
+from montecarlo import MonteCarloSimulator, ParallelMonteCarlo
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo scaling over worker processes')
+    parser.add_argument('--scenarios', type=int, default=200000)
+    parser.add_argument('--network', choices=list(NETWORKS), default='layered')
+    parser.add_argument('--events', type=int, default=1000)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    planner = generate_planner(args.network, args.events, args.seed)
+    print('tasks: %d, events: %d, scenarios: %d' % (planner.tasks_count, planner.events_count, args.scenarios))
+
+    started = time.perf_counter()
+    serial = MonteCarloSimulator(planner).run(args.scenarios, args.seed, args.chunk_size)
+    serial_time = time.perf_counter() - started
+    print('%8s %10s %8s %10s' % ('workers', 'time, s', 'speedup', 'efficiency'))
+    print('%8s %10.3f %8.2f %10.2f' % ('serial', serial_time, 1, 1))
+
+    workers = 1
+    while workers <= args.max_workers:
+        started = time.perf_counter()
+        result = ParallelMonteCarlo(planner, workers).run(args.scenarios, args.seed, args.chunk_size)
+        elapsed = time.perf_counter() - started
+        if not np.array_equal(result.histogram, serial.histogram):
+            raise Exception('Parallel result differs from the serial one')
+        print('%8d %10.3f %8.2f %10.2f' % (workers, elapsed, serial_time / elapsed, serial_time / elapsed / workers))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
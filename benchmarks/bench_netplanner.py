@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netplanner import NetPlanner
+from netgen import NETWORKS, generate_project
+
+# In pipeline order: every method is measured on a fresh planner after the ones
+# before it have run, so cached results they share are not counted twice
+METHODS = ['calc_t_exp', 'calc_determ_net_params', 'calc_full_path_reserves', 'calc_probabilistic_net_params']
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_netplanner_baseline.json')
+
+
+def measure(data, method, repeat):
+    def prepared():
+        planner = NetPlanner.from_project_data(data)
+        for i in METHODS[:METHODS.index(method)]:
+            getattr(planner, i)()
+        return planner
+
+    times = []
+    for i in range(repeat):
+        planner = prepared()
+        started = time.perf_counter()
+        getattr(planner, method)()
+        times.append(time.perf_counter() - started)
+    planner = prepared()
+    tracemalloc.start()
+    getattr(planner, method)()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def regressions(result, baseline, time_tolerance, memory_tolerance):
+    # A few milliseconds of timer noise are not reported on small networks
+    found = []
+    if result['seconds'] > baseline['seconds'] * time_tolerance and result['seconds'] - baseline['seconds'] > 0.005:
+        found.append('time x%.2f' % (result['seconds'] / max(baseline['seconds'], 1e-9)))
+    if result['peak_bytes'] > baseline['peak_bytes'] * memory_tolerance and \
+            result['peak_bytes'] - baseline['peak_bytes'] > 2**16:
+        found.append('memory x%.2f' % (result['peak_bytes'] / max(baseline['peak_bytes'], 1)))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NetPlanner methods time and peak memory on generated networks')
+    parser.add_argument('--kinds', nargs='+', choices=list(NETWORKS), default=list(NETWORKS))
+    parser.add_argument('--events', type=int, nargs='+', default=[10, 100, 1000],
+                        help='larger networks, up to 100000 events, are slow on dense meshes, '
+                             'where path enumeration dominates')
+    parser.add_argument('--marks', type=int, nargs='+', choices=[2, 3], default=[2, 3])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--time-tolerance', type=float, default=1.5)
+    parser.add_argument('--memory-tolerance', type=float, default=1.2)
+    args = parser.parse_args()
+
+    # Saving merges into the stored baseline, so it can be built up a few networks at a time
+    baseline = dict()
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = dict()
+    regressed = 0
+    print('%-16s %7s %5s %-30s %8s %10s %12s' % ('network', 'events', 'marks', 'method', 'tasks', 'time, s',
+                                                 'peak, MiB'))
+    for kind in args.kinds:
+        for events_count in args.events:
+            for marks in args.marks:
+                data = generate_project(kind, events_count, args.seed, marks == 3)
+                for method in METHODS:
+                    key = '%s/%d/%d/%s' % (kind, events_count, marks, method)
+                    seconds, peak = measure(data, method, args.repeat)
+                    results[key] = {'tasks': data['tasks_quantity'], 'seconds': seconds, 'peak_bytes': peak}
+                    found = regressions(results[key], baseline[key], args.time_tolerance, args.memory_tolerance) \
+                        if key in baseline and not args.save_baseline else []
+                    regressed += bool(found)
+                    print('%-16s %7d %5d %-30s %8d %10.4f %12.2f %s' % (
+                        kind, events_count, marks, method, data['tasks_quantity'], seconds, peak / 2**20,
+                        'REGRESSION: ' + ', '.join(found) if found else ''))
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=1, sort_keys=True)
+        print('baseline saved to %s' % args.baseline)
+    elif baseline:
+        print('%d of %d measurements regressed' % (regressed, len(results)))
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netplanner import NetPlanner
+from netgen import NETWORKS, generate_project
+from serializer import Serializer
+
+
+def measure(load, path, repeat):
+    times = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        NetPlanner.from_project_data(load(path))
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    NetPlanner.from_project_data(load(path))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Project load time, JSON against the binary format')
+    parser.add_argument('--network', choices=list(NETWORKS), default='layered')
+    parser.add_argument('--events', type=int, nargs='+', default=[5000, 50000, 250000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for events_count in args.events:
+            json_path = os.path.join(directory, 'project.json')
+            binary_path = os.path.join(directory, 'project.npp')
+            data = generate_project(args.network, events_count, args.seed)
+            tasks_count = data['tasks_quantity']
+            Serializer.serialize(json_path, data)
+            Serializer.serialize_binary(binary_path, data)
+            for name, load, path in [('json', Serializer.deserialize, json_path),
+                                     ('binary', Serializer.deserialize_binary, binary_path)]:
+                seconds, peak = measure(load, path, args.repeat)
+                print('%8d tasks %-7s %8.1f MiB on disk  load %8.3f s  peak %8.1f MiB' %
+                      (tasks_count, name, os.path.getsize(path) / 2**20, seconds, peak / 2**20))
+
+
+if __name__ == '__main__':
+    main()
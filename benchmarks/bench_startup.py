@@ -0,0 +1,53 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_WINDOW = '''
+from PyQt5 import QtWidgets
+from window import Window
+app = QtWidgets.QApplication([])
+window = Window()
+window.show()
+app.processEvents()
+'''
+
+
+def measure(code, repeat, env=None):
+    # Wall time of a fresh interpreter running code, interpreter startup included
+    times = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def report(name, times):
+    print('%-28s median %7.1f ms, min %7.1f ms' % (name, statistics.median(times) * 1000, min(times) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start time of NetPlanner and of the GUI')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    report('python -c pass', measure('pass', args.repeat))
+    report('import netplanner', measure('import netplanner', args.repeat))
+    report('import batch', measure('import batch', args.repeat))
+    try:
+        import PyQt5
+    except ImportError:
+        print('PyQt5 is not installed, skipping time to first window')
+        return
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    report('time to first window', measure(FIRST_WINDOW, args.repeat, env))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+from PyQt5 import QtCore
+import itertools
+from gantt import render_gantt
+
+FIRST_PAGE = 256
+
+
+class CalculationCancelled(Exception):
+    pass
+
+
+class CalculationSignals(QtCore.QObject):
+    # QRunnable is not a QObject, so its signals live here; they are delivered
+    # to the window in the GUI thread
+    progress = QtCore.pyqtSignal(str, int)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+
+class CalculationWorker(QtCore.QRunnable):
+    stages = [
+        'Ожидаемые времена',
+        'Детерминированные параметры',
+        'Резервы путей',
+        'Вероятности',
+        'Распределение ресурсов',
+        'Диаграмма Ганта'
+    ]
+
+    def __init__(self, planner, tasks_resources=None, resource_capacity=0, first_page=FIRST_PAGE):
+        # Without a resource capacity tasks are scheduled at their early starts
+        super(CalculationWorker, self).__init__()
+        self.planner = planner
+        self.tasks_resources = tasks_resources
+        self.resource_capacity = resource_capacity
+        self.first_page = first_page
+        self.signals = CalculationSignals()
+        self.cancel_requested = False
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def check_cancelled(self):
+        if self.cancel_requested:
+            raise CalculationCancelled()
+
+    def stage(self, index):
+        self.check_cancelled()
+        self.signals.progress.emit(self.stages[index], int(100 * index / len(self.stages)))
+
+    def first_paths(self, paths):
+        # The first page of paths is found here, where it can be cancelled between
+        # paths; the rest are pulled from the same iterator as the table scrolls
+        first_paths = []
+        for i in itertools.islice(paths, self.first_page):
+            self.check_cancelled()
+            first_paths.append(i)
+        return first_paths
+
+    def run(self):
+        planner = self.planner
+        results = dict()
+        try:
+            self.stage(0)
+            results['tasks_expected'], results['dispersion'] = planner.calc_t_exp()
+
+            self.stage(1)
+            results['determ'] = planner.calc_determ_net_params()
+
+            self.stage(2)
+            results['paths_source'] = planner.iter_critical_paths()
+            results['paths'] = self.first_paths(results['paths_source'])
+
+            self.stage(3)
+            results['events_dispersion'], results['probabilities'] = planner.calc_probabilistic_net_params()
+
+            self.stage(4)
+            results['schedule'] = None
+            if self.resource_capacity and self.tasks_resources is not None:
+                results['schedule'] = planner.calc_resource_schedule(self.tasks_resources, self.resource_capacity)
+
+            self.stage(5)
+            determ = results['determ']
+            start_times = determ[2] if results['schedule'] is None else results['schedule']['start']
+            with planner.stage('gantt'):
+                results['gantt'] = render_gantt(start_times, results['tasks_expected'],
+                                                planner.graph.tasks_start_events, planner.graph.tasks_end_events,
+                                                determ[7])
+            self.check_cancelled()
+        except CalculationCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.progress.emit('Готово', 100)
+        self.signals.finished.emit(results)
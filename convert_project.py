@@ -0,0 +1,50 @@
+import argparse
+import csv
+import sys
+import numpy as np
+from serializer import Serializer, BINARY_EXTENSION
+from importer import ImportedProject, PARQUET_EXTENSION
+
+IMPORT_EXTENSIONS = ('.csv', PARQUET_EXTENSION)
+
+
+def convert(source, target, events=None, labels=None):
+    # The target format follows its extension: binary for BINARY_EXTENSION, JSON otherwise.
+    # CSV and Parquet task exports are imported, their event labels can be kept in a CSV file
+    if not source.endswith(IMPORT_EXTENSIONS):
+        Serializer.save(target, Serializer.load(source))
+        return
+    project = ImportedProject(source, events)
+    if not target.endswith(BINARY_EXTENSION) and np.isinf(project.data['event_params_columns'][0]).any():
+        raise Exception('Events without limits can only be saved in the binary (%s) format' % BINARY_EXTENSION)
+    Serializer.save(target, project.data)
+    if labels is not None:
+        try:
+            with open(labels, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(['index', 'event'])
+                writer.writerows(enumerate(project.labels.labels))
+        except OSError:
+            raise Exception('File not found')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert projects between the JSON and the binary (%s) '
+                                                 'formats, or import CSV and Parquet task exports' % BINARY_EXTENSION)
+    parser.add_argument('source', help='project file in either format, or tasks in a .csv or %s file with '
+                                       'start, end, optimistic, pessimistic(, most_likely) columns'
+                                       % PARQUET_EXTENSION)
+    parser.add_argument('target', help='output file, binary when it ends with %s' % BINARY_EXTENSION)
+    parser.add_argument('--events', help='imported events directive limits, event and limit columns')
+    parser.add_argument('--labels', help='write the imported events labels by index to this CSV file')
+    args = parser.parse_args(argv)
+    try:
+        convert(args.source, args.target, args.events, args.labels)
+    except Exception as e:
+        print('%s: %s' % (args.source, e), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
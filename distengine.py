@@ -0,0 +1,236 @@
+import numpy as np
+from montecarlo import pert_beta_params
+from netgraph import AncestorTree
+
+# Cumulative probability closer than this to 0 or 1 is cut off the arrays
+TRIM_EPSILON = 1e-12
+# Points kept per event CDF in the result; the grid ones are dropped once the
+# event's tasks are convolved, so memory stays linear in the network size
+STORED_POINTS = 256
+# Beta samples taken at once while discretizing tasks
+DISCRETIZE_CHUNK = 2**20
+
+
+def _moments(offset, cdf):
+    # Mean and variance in grid steps
+    pmf = np.diff(cdf, prepend=0)
+    points = offset + np.arange(len(cdf))
+    mean = (pmf * points).sum()
+    return [mean, (pmf * (points - mean)**2).sum()]
+
+
+class DistributionResult:
+    # Completion time distribution of every event: cdfs[event][i] = P(T <= t) at
+    # t = starts[event] + i * strides[event], 0 before the array and 1 after it;
+    # a single value with stride 0 is an exact time, like the source's. Moments
+    # come from the full grid, the CDFs are resampled to a bounded size. The grid
+    # spreads mass up to a cell past the real support [lower, upper] of an event
+    # (all tasks at their early or late marks), so the CDF is 0 below lower and 1
+    # from upper on
+    def __init__(self, starts, strides, cdfs, means, variances, lower, upper, events_time_limits, runoff):
+        self.starts = starts
+        self.strides = strides
+        self.cdfs = cdfs
+        self.means = means
+        self.variances = variances
+        self.lower = lower
+        self.upper = upper
+        self.events_time_limits = events_time_limits
+        self.runoff = runoff
+
+    def times(self, event=None):
+        event = self.runoff if event is None else event
+        return self.starts[event] + np.arange(len(self.cdfs[event])) * self.strides[event]
+
+    def cdf(self, deadline, event=None):
+        # P(T <= deadline) for the project or an event, any array of deadlines
+        event = self.runoff if event is None else event
+        deadline = np.asarray(deadline, dtype=np.float64)
+        if len(self.cdfs[event]) == 1:
+            return np.where(deadline >= self.starts[event], 1.0, 0.0)[()]
+        cdf = np.interp(deadline, self.times(event), self.cdfs[event], left=0, right=1)
+        return np.where(deadline < self.lower[event], 0.0, np.where(deadline >= self.upper[event], 1.0, cdf))[()]
+
+    def quantile(self, q, event=None):
+        event = self.runoff if event is None else event
+        return np.clip(np.interp(q, self.cdfs[event], self.times(event)), self.lower[event], self.upper[event])
+
+    def moments(self, event=None):
+        event = self.runoff if event is None else event
+        return [float(self.means[event]), float(self.variances[event])]
+
+    @property
+    def mean(self):
+        return self.moments()[0]
+
+    @property
+    def std(self):
+        return np.sqrt(self.moments()[1])
+
+    @property
+    def events_probabilities(self):
+        return np.array([self.cdf(limit, event) for event, limit in enumerate(self.events_time_limits.tolist())])
+
+
+class DistributionEngine:
+    # Task durations follow the same Beta distributions as in the Monte Carlo
+    # simulation, discretized on a common time grid with resolution cells across a
+    # typical task. Distributions go through the network in topological order:
+    # the arrival over a task is the start event distribution convolved (FFT)
+    # with the task one, and arrivals at an event are folded pairwise into their
+    # max. A product of CDFs alone would take merging arrivals as independent,
+    # while paths that reconverge share most of their tasks; so the max is taken
+    # under a mixture of the independent and the comonotone joint distributions,
+    # rho * min(F, G) + (1 - rho) * F * G, with rho the correlation estimated as
+    # in the 'clark' dispersion mode of NetPlanner
+    def __init__(self, planner, resolution=32, stored_points=STORED_POINTS):
+        self.planner = planner
+        self.stored_points = stored_points
+        self.graph = planner.graph
+        early, late = planner.tasks_early, planner.tasks_late
+        width = np.maximum(late - early, 0)
+        positive = width[width > 0]
+        if len(positive):
+            self.step = float(np.median(positive)) / resolution
+        else:
+            self.step = max(float(self.graph.calc_early_times(early)[planner.runoff]), 1) / resolution
+        self.task_offsets, self.kernel_ptr, self.kernels = self.__discretize(early, width,
+                                                                             *pert_beta_params(planner))
+
+    def __discretize(self, early, width, alpha, beta):
+        # Each task is sampled at points spread over [early, late] with Beta
+        # weights, and every sample's mass is split linearly between its two
+        # neighbouring grid points, which keeps the mean. Kernels are stored in
+        # CSR form: task i covers grid points task_offsets[i] + k
+        step = self.step
+        samples = np.maximum(4, 4 * np.ceil(width / step)).astype(np.int64)
+        samples[width == 0] = 1
+        task_offsets = np.floor(early / step).astype(np.int64)
+        # The last sample is the furthest one
+        last = (early + width * ((samples - 0.5) / samples)) / step - task_offsets
+        kernel_ptr = np.concatenate([[0], np.cumsum(np.floor(last).astype(np.int64) + 2)])
+        kernels = np.empty(kernel_ptr[-1])
+
+        # Tasks go in chunks of about DISCRETIZE_CHUNK samples to bound the memory
+        bounds = np.searchsorted(np.cumsum(samples), np.arange(1, samples.sum() // DISCRETIZE_CHUNK + 1) *
+                                 DISCRETIZE_CHUNK)
+        for first, stop in zip([0] + (bounds + 1).tolist(), (bounds + 1).tolist() + [len(width)]):
+            if first >= stop:
+                continue
+            chunk_samples = samples[first:stop]
+            tasks = np.repeat(np.arange(first, stop), chunk_samples)
+            fractions = (np.arange(len(tasks)) - np.repeat(np.cumsum(chunk_samples) - chunk_samples, chunk_samples) +
+                         0.5) / samples[tasks]
+            weights = fractions**(alpha[tasks] - 1) * (1 - fractions)**(beta[tasks] - 1)
+            weights /= np.bincount(tasks - first, weights, stop - first)[tasks - first]
+            position = (early[tasks] + width[tasks] * fractions) / step - task_offsets[tasks]
+            lower = np.floor(position).astype(np.int64)
+            upper_share = position - lower
+            points = kernel_ptr[tasks] - kernel_ptr[first] + lower
+            size = kernel_ptr[stop] - kernel_ptr[first]
+            kernels[kernel_ptr[first]:kernel_ptr[stop]] = np.bincount(points, weights * (1 - upper_share), size) + \
+                np.bincount(points + 1, weights * upper_share, size)
+        return [task_offsets, kernel_ptr, kernels]
+
+    @staticmethod
+    def __trim(offset, cdf):
+        cdf = np.minimum(cdf, 1)
+        first = int(np.searchsorted(cdf, TRIM_EPSILON))
+        last = int(np.searchsorted(cdf, 1 - TRIM_EPSILON)) + 1
+        first = min(first, len(cdf) - 1)
+        return [offset + first, cdf[first:max(last, first + 1)]]
+
+    def __stored(self, offset, cdf):
+        # [start, stride, CDF] of the result, read at the grid cell ends
+        step = self.step
+        if len(cdf) == 1:
+            return [offset * step, 0.0, cdf.astype(np.float32)]
+        if len(cdf) > self.stored_points:
+            points = np.linspace(0, len(cdf) - 1, self.stored_points)
+            return [(offset + 0.5) * step, (points[1] - points[0]) * step,
+                    np.interp(points, np.arange(len(cdf)), cdf).astype(np.float32)]
+        return [(offset + 0.5) * step, step, cdf.astype(np.float32)]
+
+    @staticmethod
+    def __merge(offset, cdf, other_offset, other_cdf, correlation):
+        start = max(offset, other_offset)
+        size = max(offset + len(cdf), other_offset + len(other_cdf)) - start
+        aligned = []
+        for i_offset, i_cdf in [(offset, cdf), (other_offset, other_cdf)]:
+            part = np.ones(size)
+            values = i_cdf[start - i_offset:]
+            part[:len(values)] = values
+            aligned.append(part)
+        independent = aligned[0] * aligned[1]
+        if correlation > 0:
+            independent += correlation * (np.minimum(aligned[0], aligned[1]) - independent)
+        return [start, independent]
+
+    def run(self):
+        planner, graph = self.planner, self.graph
+        kernel_ptr, kernels = self.kernel_ptr, self.kernels
+        succ_ptr, succ_tasks = graph.succ_ptr, graph.succ_tasks
+        end_events = graph.tasks_end_events
+        kernel_tasks = np.repeat(np.arange(planner.tasks_count), np.diff(kernel_ptr))
+        tasks_mean = self.task_offsets + np.bincount(kernel_tasks, kernels * (np.arange(len(kernels)) -
+                                                                              kernel_ptr[kernel_tasks]),
+                                                     planner.tasks_count)
+        # Events reached over deterministic tasks only keep their exact times
+        # in the result rather than the grid approximation
+        exact = graph.calc_early_times(np.maximum(planner.tasks_late - planner.tasks_early, 0)) == 0
+        exact_times = graph.calc_early_times(planner.tasks_early)
+        upper = graph.calc_early_times(np.maximum(planner.tasks_late, planner.tasks_early))
+        starts, strides = np.zeros(planner.events_count), np.zeros(planner.events_count)
+        cdfs = [None] * planner.events_count
+        means, variances = exact_times.copy(), np.zeros(planner.events_count)
+        variance = [0.0] * planner.events_count
+        tree = AncestorTree(planner.events_count)
+        # end event -> [offset, cdf, dominant predecessor, its arrival mean]
+        pending = dict()
+        for event in graph.topological_order().tolist():
+            offset, cdf = 0, np.ones(1)
+            if event in pending:
+                offset, cdf, best, best_mean = pending.pop(event)
+                tree.attach(event, best)
+            mean, variance[event] = _moments(offset, cdf)
+            if exact[event]:
+                starts[event], cdfs[event] = exact_times[event], np.ones(1, dtype=np.float32)
+            else:
+                starts[event], strides[event], cdfs[event] = self.__stored(offset, cdf)
+                means[event], variances[event] = mean * self.step, variance[event] * self.step**2
+            tasks = succ_tasks[succ_ptr[event]:succ_ptr[event + 1]]
+            if not len(tasks):
+                continue
+
+            # One forward transform of the event distribution for all its tasks
+            lengths = kernel_ptr[tasks + 1] - kernel_ptr[tasks]
+            size = len(cdf) + int(lengths.max()) - 1
+            matrix = np.zeros((len(tasks), int(lengths.max())))
+            rows = np.repeat(np.arange(len(tasks)), lengths)
+            columns = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            matrix[rows, columns] = kernels[np.repeat(kernel_ptr[tasks], lengths) + columns]
+            fft_size = 1 << (size - 1).bit_length()
+            arrivals = np.fft.irfft(np.fft.rfft(np.diff(cdf, prepend=0), fft_size) *
+                                    np.fft.rfft(matrix, fft_size, axis=1), fft_size, axis=1)[:, :size]
+            arrivals = np.cumsum(np.maximum(arrivals, 0), axis=1)
+
+            for task, length, arrival in zip(tasks.tolist(), lengths.tolist(), arrivals):
+                arrival_offset, arrival = self.__trim(offset + int(self.task_offsets[task]),
+                                                      arrival[:len(cdf) + length - 1])
+                arrival_mean = mean + tasks_mean[task]
+                end = int(end_events[task])
+                if end not in pending:
+                    pending[end] = [arrival_offset, arrival, event, arrival_mean]
+                    continue
+                merged_offset, merged, best, best_mean = pending[end]
+                correlation = 0.0
+                common = tree.common_ancestor(best, event)
+                if common >= 0 and variance[common] > 0:
+                    deviations = np.sqrt(_moments(merged_offset, merged)[1] * _moments(arrival_offset, arrival)[1])
+                    correlation = min(1.0, variance[common] / deviations) if deviations > 0 else 1.0
+                merged_offset, merged = self.__merge(merged_offset, merged, arrival_offset, arrival, correlation)
+                if arrival_mean > best_mean:
+                    best, best_mean = event, arrival_mean
+                pending[end] = [merged_offset, merged, best, best_mean]
+        return DistributionResult(starts, strides, cdfs, means, variances, exact_times, upper,
+                                  planner.events_time_limits.copy(), planner.runoff)
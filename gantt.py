@@ -0,0 +1,99 @@
+import io
+import math
+import numpy as np
+from netgraph import TIME_EPSILON
+
+MAX_ROWS = 200
+MAX_LABELED_ROWS = 60
+ROW_HEIGHT = 0.2
+
+available_colors = [
+    'tab:blue',
+    'tab:orange',
+    'tab:green',
+    'tab:purple',
+    'tab:brown',
+    'tab:pink',
+    'tab:gray',
+    'tab:olive',
+    'tab:cyan',
+]
+
+
+def gantt_rows(start_events, end_events, critical, max_rows=MAX_ROWS):
+    # Row of every task and the row labels. Tasks are ordered by their events;
+    # when there are more than max_rows of them, each run of non-critical tasks
+    # between two critical ones is collapsed into one row, and rows that still
+    # don't fit are merged evenly
+    start_events = np.asarray(start_events, dtype=np.int64)
+    end_events = np.asarray(end_events, dtype=np.int64)
+    critical = np.asarray(critical, dtype=bool)
+    order = np.lexsort((end_events, start_events))
+    labels = ['%d-%d' % (start_events[i], end_events[i]) for i in order.tolist()]
+    rows = np.empty(len(order), dtype=np.int64)
+    if len(order) <= max_rows:
+        rows[order] = np.arange(len(order))
+        return [rows, labels]
+
+    # A new row starts at every critical task and at the first task after one
+    ordered_critical = critical[order]
+    new_row = ordered_critical | np.concatenate([[True], ordered_critical[:-1]])
+    ordered_rows = np.cumsum(new_row) - 1
+    rows_count = int(ordered_rows[-1]) + 1
+    starts = np.flatnonzero(new_row)
+    sizes = np.diff(np.append(starts, len(order)))
+    labels = [labels[start] if size == 1 else '%s … (%d)' % (labels[start], size)
+              for start, size in zip(starts.tolist(), sizes.tolist())]
+    if rows_count > max_rows:
+        ordered_rows = ordered_rows * max_rows // rows_count
+        labels = [labels[i] for i in np.searchsorted(np.arange(rows_count) * max_rows // rows_count,
+                                                     np.arange(max_rows)).tolist()]
+    rows[order] = ordered_rows
+    return [rows, labels]
+
+
+def render_gantt(start_times, durations, start_events, end_events, full_reserves,
+                 max_rows=MAX_ROWS, dpi=100):
+    # PNG image of the Gantt chart, rendered in memory. All bars are drawn by a
+    # single PolyCollection, so the cost barely depends on the tasks count
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import PolyCollection
+
+    durations = np.asarray(durations, dtype=np.float64)
+    shown = durations != 0
+    start_times = np.asarray(start_times, dtype=np.float64)[shown]
+    durations = durations[shown]
+    critical = np.asarray(full_reserves, dtype=np.float64)[shown] <= TIME_EPSILON
+    rows, labels = gantt_rows(np.asarray(start_events)[shown], np.asarray(end_events)[shown], critical, max_rows)
+    rows_count = len(labels)
+
+    fig = Figure(figsize=(6.4, max(4.8, 1 + ROW_HEIGHT * rows_count)), dpi=dpi)
+    FigureCanvasAgg(fig)
+    gnt = fig.subplots()
+
+    # Rectangles as (tasks, 4 corners, x/y)
+    bottom, top = rows + 0.1, rows + 0.9
+    end_times = start_times + durations
+    verts = np.stack([np.stack([start_times, bottom], axis=1), np.stack([start_times, top], axis=1),
+                      np.stack([end_times, top], axis=1), np.stack([end_times, bottom], axis=1)], axis=1)
+    colors = np.array(available_colors, dtype=object)[rows % len(available_colors)]
+    colors[critical] = 'tab:red'
+    gnt.add_collection(PolyCollection(verts, facecolors=colors.tolist(), edgecolors='none',
+                                      alpha=0.8 if rows_count < len(rows) else 1))
+
+    x_lim = end_times.max() if len(end_times) else 1
+    gnt.set_xlim(0, x_lim)
+    gnt.set_ylim(0, max(rows_count, 1))
+    gnt.set_xlabel('Time')
+    gnt.set_ylabel('Tasks')
+    gnt.grid(True)
+
+    step = math.ceil(rows_count / MAX_LABELED_ROWS) if rows_count else 1
+    gnt.set_yticks(np.arange(0, rows_count, step) + 0.5)
+    gnt.set_yticklabels(labels[::step])
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
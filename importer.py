@@ -0,0 +1,150 @@
+import csv
+import itertools
+import numpy as np
+from netplanner import NetPlanner
+
+# Header names in task and event exports; the most possible duration column is
+# optional and switches the project to the 3-mark system
+TASK_COLUMNS = ['start', 'end', 'optimistic', 'pessimistic', 'most_likely']
+EVENT_COLUMNS = ['event', 'limit']
+CHUNK_ROWS = 2**16
+PARQUET_EXTENSION = '.parquet'
+
+
+class EventLabels:
+    # Hash index of event labels: every new label gets the next dense 0-based
+    # index, labels[i] is the label of event i. Labels are kept as strings
+    def __init__(self):
+        self.index = dict()
+        self.labels = []
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, labels):
+        # Indices of an array of labels, adding the new ones. Only the distinct
+        # labels of the array go through the dict
+        unique, inverse = np.unique(np.asarray(labels).astype(str), return_inverse=True)
+        indices = np.empty(len(unique), dtype=np.int64)
+        for i, label in enumerate(unique.tolist()):
+            index = self.index.get(label)
+            if index is None:
+                index = self.index[label] = len(self.labels)
+                self.labels.append(label)
+            indices[i] = index
+        return indices[inverse.reshape(-1)]
+
+    def find(self, labels):
+        unique, inverse = np.unique(np.asarray(labels).astype(str), return_inverse=True)
+        indices = np.empty(len(unique), dtype=np.int64)
+        for i, label in enumerate(unique.tolist()):
+            if label not in self.index:
+                raise Exception('Unknown event %s' % label)
+            indices[i] = self.index[label]
+        return indices[inverse.reshape(-1)]
+
+    def names(self, events):
+        # Labels of event indices, like the ones in found paths
+        return [self.labels[i] for i in np.asarray(events, dtype=np.int64).tolist()]
+
+    def to_dict(self, values):
+        # Per-event results keyed by the original labels
+        return dict(zip(self.labels, np.asarray(values).tolist()))
+
+
+def iter_csv_chunks(path, columns, optional=(), chunk_rows=CHUNK_ROWS, delimiter=','):
+    # Lists of column arrays, strings, of up to chunk_rows rows; optional columns
+    # missing from the header come as None
+    try:
+        with open(path, newline='') as file:
+            reader = csv.reader(file, delimiter=delimiter)
+            header = [i.strip() for i in next(reader, [])]
+            positions = []
+            for name in columns:
+                if name in header:
+                    positions.append(header.index(name))
+                elif name in optional:
+                    positions.append(None)
+                else:
+                    raise Exception('Column %s not found' % name)
+            while True:
+                rows = list(itertools.islice(reader, chunk_rows))
+                if not rows:
+                    return
+                if any(len(row) != len(header) for row in rows):
+                    raise Exception('Row has incorrect number of values')
+                values = list(zip(*rows))
+                yield [None if i is None else np.array(values[i]) for i in positions]
+    except OSError:
+        raise Exception('File not found')
+
+
+def iter_parquet_chunks(path, columns, optional=(), chunk_rows=CHUNK_ROWS):
+    # Same chunks as iter_csv_chunks from a Parquet file, pyarrow is only needed here
+    try:
+        import pyarrow.parquet as parquet
+    except ImportError:
+        raise Exception('Parquet import needs pyarrow')
+    try:
+        file = parquet.ParquetFile(path)
+    except OSError:
+        raise Exception('File not found')
+    present = set(file.schema_arrow.names)
+    for name in columns:
+        if name not in present and name not in optional:
+            raise Exception('Column %s not found' % name)
+    names = [i for i in columns if i in present]
+    for batch in file.iter_batches(batch_size=chunk_rows, columns=names):
+        yield [batch.column(names.index(i)).to_numpy(zero_copy_only=False) if i in present else None
+               for i in columns]
+
+
+def iter_chunks(path, columns, optional=(), chunk_rows=CHUNK_ROWS):
+    # The format follows the extension: Parquet for PARQUET_EXTENSION, CSV otherwise
+    if path.endswith(PARQUET_EXTENSION):
+        return iter_parquet_chunks(path, columns, optional, chunk_rows)
+    return iter_csv_chunks(path, columns, optional, chunk_rows)
+
+
+def _durations(column, name):
+    try:
+        return np.asarray(column).astype(np.float64)
+    except ValueError:
+        raise Exception('Column %s has incorrect values' % name)
+
+
+class ImportedProject:
+    # Tasks (and directive limits) read chunk by chunk from CSV or Parquet
+    # exports with any event labels. data is the project in Serializer's column
+    # form, labels maps events back to the original IDs. Events without a limit
+    # get an infinite one
+    def __init__(self, tasks_path, events_path=None, chunk_rows=CHUNK_ROWS, task_columns=TASK_COLUMNS,
+                 event_columns=EVENT_COLUMNS):
+        self.labels = EventLabels()
+        chunks = [[] for i in task_columns]
+        use3mark_system = None
+        for values in iter_chunks(tasks_path, task_columns, task_columns[4:], chunk_rows):
+            if use3mark_system is None:
+                use3mark_system = values[4] is not None
+            chunks[0].append(self.labels.add(values[0]))
+            chunks[1].append(self.labels.add(values[1]))
+            for i in range(2, 5 if use3mark_system else 4):
+                chunks[i].append(_durations(values[i], task_columns[i]))
+        if use3mark_system is None:
+            raise Exception('Project has no tasks')
+        columns = [np.concatenate(i) for i in chunks[:5 if use3mark_system else 4]]
+
+        limits = np.full(len(self.labels), np.inf)
+        if events_path is not None:
+            for values in iter_chunks(events_path, event_columns, chunk_rows=chunk_rows):
+                limits[self.labels.find(values[0])] = _durations(values[1], event_columns[1])
+        self.data = {
+            'tasks_quantity': len(columns[0]),
+            'events_quantity': len(self.labels),
+            'use3mark_system': use3mark_system,
+            'tasks_params_columns': columns,
+            'event_params_columns': [limits]
+        }
+
+    def planner(self, profiler=None):
+        return NetPlanner.from_project_data(self.data, profiler)
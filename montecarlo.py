@@ -0,0 +1,199 @@
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from netgraph import TIME_EPSILON, MEMORY_BUDGET
+
+
+def pert_beta_params(planner):
+    # Beta distribution on [early, late] for every task: beta-PERT for the 3 marks
+    # method and Beta(2, 3) for the 2 marks one, whose mean (3a + 2b) / 5 and
+    # dispersion (b - a)^2 / 25 match the expected time formulas of NetPlanner
+    width = planner.tasks_late - planner.tasks_early
+    if planner.use_3_marks_method:
+        safe_width = np.where(width > 0, width, 1)
+        possible = np.clip(planner.tasks_possible, planner.tasks_early, planner.tasks_late)
+        alpha = 1 + 4 * (possible - planner.tasks_early) / safe_width
+        beta = 1 + 4 * (planner.tasks_late - possible) / safe_width
+    else:
+        alpha = np.full(planner.tasks_count, 2.0)
+        beta = np.full(planner.tasks_count, 3.0)
+    return [alpha, beta]
+
+
+class MonteCarloResult:
+    def __init__(self, bin_edges, events_count, tasks_count):
+        self.bin_edges = bin_edges
+        self.histogram = np.zeros(len(bin_edges) - 1, dtype=np.int64)
+        self.events_hits = np.zeros(events_count, dtype=np.int64)
+        self.critical_counts = np.zeros(tasks_count, dtype=np.int64)
+        self.scenarios_count = 0
+        self.duration_sum = 0.0
+        self.duration_squares_sum = 0.0
+        self.samples = None
+
+    @property
+    def mean(self):
+        return self.duration_sum / self.scenarios_count
+
+    @property
+    def std(self):
+        return np.sqrt(max(self.duration_squares_sum / self.scenarios_count - self.mean**2, 0))
+
+    @property
+    def events_probabilities(self):
+        return self.events_hits / self.scenarios_count
+
+    @property
+    def criticality_index(self):
+        return self.critical_counts / self.scenarios_count
+
+    def cdf(self, deadline):
+        # P(T <= deadline), linear inside histogram bins
+        cumulative = np.concatenate([[0], np.cumsum(self.histogram)]) / self.scenarios_count
+        return np.interp(deadline, self.bin_edges, cumulative)
+
+    def quantile(self, q):
+        cumulative = np.concatenate([[0], np.cumsum(self.histogram)]) / self.scenarios_count
+        return np.interp(q, cumulative, self.bin_edges)
+
+
+class MonteCarloSimulator:
+    def __init__(self, planner, bins=1000):
+        self.planner = planner
+        self.graph = planner.graph
+        self.alpha, self.beta = pert_beta_params(planner)
+        self.width = planner.tasks_late - planner.tasks_early
+
+        # Project duration can't leave [all tasks early, all tasks late]
+        t_min = self.graph.calc_early_times(planner.tasks_early)[planner.runoff]
+        t_max = self.graph.calc_early_times(planner.tasks_late)[planner.runoff]
+        self.bin_edges = np.linspace(t_min, max(t_max, t_min + TIME_EPSILON), bins + 1)
+
+    def chunk_size(self, scenarios):
+        # durations, early and tail times of one chunk stay within MEMORY_BUDGET
+        per_scenario = 8 * (3 * self.planner.tasks_count + 2 * self.planner.events_count)
+        return max(1, min(scenarios, MEMORY_BUDGET // per_scenario))
+
+    def sample_durations(self, rng, size):
+        # tasks x scenarios
+        fractions = rng.beta(self.alpha[:, None], self.beta[:, None], size=(self.planner.tasks_count, size))
+        return self.planner.tasks_early[:, None] + np.maximum(self.width, 0)[:, None] * fractions
+
+    def simulate_chunk(self, rng, size, result):
+        planner = self.planner
+        durations = self.sample_durations(rng, size)
+        t_early = self.graph.calc_early_times(durations)
+        t_tail = self.graph.calc_tail_times(durations)
+        project_duration = t_early[planner.runoff]
+
+        # A task is critical in a scenario when it lies on one of its longest paths
+        critical = (t_early[self.graph.tasks_start_events] + durations + t_tail[self.graph.tasks_end_events] >=
+                    project_duration - TIME_EPSILON)
+
+        bins = len(result.histogram)
+        bin_index = np.clip(np.searchsorted(result.bin_edges, project_duration, side='right') - 1, 0, bins - 1)
+        result.histogram += np.bincount(bin_index, minlength=bins)
+        result.events_hits += np.count_nonzero(t_early <= planner.events_time_limits[:, None], axis=1)
+        result.critical_counts += np.count_nonzero(critical, axis=1)
+        result.scenarios_count += size
+        result.duration_sum += project_duration.sum()
+        result.duration_squares_sum += np.square(project_duration).sum()
+        return project_duration
+
+    def chunks(self, scenarios, chunk_size=None):
+        # Every chunk gets its own child of the seed sequence, so samples depend only
+        # on the seed and chunk layout, not on which process runs the chunk
+        chunk_size = chunk_size or self.chunk_size(scenarios)
+        return [min(chunk_size, scenarios - start) for start in range(0, scenarios, chunk_size)]
+
+    def run(self, scenarios, seed=None, chunk_size=None, keep_samples=False):
+        result = MonteCarloResult(self.bin_edges, self.planner.events_count, self.planner.tasks_count)
+        chunks = self.chunks(scenarios, chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+        samples = []
+        for size, chunk_seed in zip(chunks, seeds):
+            project_duration = self.simulate_chunk(np.random.default_rng(chunk_seed), size, result)
+            if keep_samples:
+                samples.append(project_duration)
+        if keep_samples:
+            result.samples = np.concatenate(samples) if samples else np.zeros(0)
+        return result
+
+
+def _shared_arrays(buffer, layout):
+    arrays = dict()
+    offset = 0
+    for name, dtype, shape in layout:
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        offset += arrays[name].nbytes
+    return arrays
+
+
+_worker_state = dict()
+
+
+def _init_worker(planner, bins, memory_name, layout):
+    _worker_state['simulator'] = MonteCarloSimulator(planner, bins)
+    _worker_state['memory'] = shared_memory.SharedMemory(name=memory_name)
+    _worker_state['arrays'] = _shared_arrays(_worker_state['memory'].buf, layout)
+
+
+def _run_worker_chunks(slot, chunks):
+    # Counts go to this worker's own row of the shared buffers, moments to the
+    # slots of the chunks, so nothing but the chunk list crosses the process boundary
+    simulator, arrays = _worker_state['simulator'], _worker_state['arrays']
+    result = MonteCarloResult(simulator.bin_edges, 0, 0)
+    result.histogram = arrays['histogram'][slot]
+    result.events_hits = arrays['events_hits'][slot]
+    result.critical_counts = arrays['critical_counts'][slot]
+    for index, size, chunk_seed in chunks:
+        project_duration = simulator.simulate_chunk(np.random.default_rng(chunk_seed), size, result)
+        arrays['moments'][index] = [project_duration.sum(), np.square(project_duration).sum()]
+    return slot
+
+
+class ParallelMonteCarlo:
+    def __init__(self, planner, workers=None, bins=1000):
+        self.planner = planner
+        self.workers = workers or os.cpu_count() or 1
+        self.bins = bins
+        self.simulator = MonteCarloSimulator(planner, bins)
+
+    def run(self, scenarios, seed=None, chunk_size=None):
+        # Chunks and their seeds are laid out exactly as in MonteCarloSimulator.run,
+        # so any number of workers reproduces the serial result
+        chunks = self.simulator.chunks(scenarios, chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+        workers = max(1, min(self.workers, len(chunks)))
+        layout = [('histogram', np.int64, (workers, self.bins)),
+                  ('events_hits', np.int64, (workers, self.planner.events_count)),
+                  ('critical_counts', np.int64, (workers, self.planner.tasks_count)),
+                  ('moments', np.float64, (len(chunks), 2))]
+        size = sum(np.dtype(dtype).itemsize * int(np.prod(shape)) for name, dtype, shape in layout)
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            arrays = _shared_arrays(memory.buf, layout)
+            for array in arrays.values():
+                array[...] = 0
+            jobs = [[] for i in range(workers)]
+            for index, (chunk, chunk_seed) in enumerate(zip(chunks, seeds)):
+                jobs[index % workers].append((index, chunk, chunk_seed))
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(self.planner, self.bins, memory.name, layout)) as executor:
+                for future in [executor.submit(_run_worker_chunks, slot, jobs[slot]) for slot in range(workers)]:
+                    future.result()
+
+            result = MonteCarloResult(self.simulator.bin_edges, self.planner.events_count, self.planner.tasks_count)
+            result.histogram += arrays['histogram'].sum(axis=0)
+            result.events_hits += arrays['events_hits'].sum(axis=0)
+            result.critical_counts += arrays['critical_counts'].sum(axis=0)
+            result.scenarios_count = scenarios
+            for duration_sum, duration_squares_sum in arrays['moments'].tolist():
+                result.duration_sum += duration_sum
+                result.duration_squares_sum += duration_squares_sum
+            del arrays
+        finally:
+            memory.close()
+            memory.unlink()
+        return result
@@ -0,0 +1,106 @@
+import numpy as np
+from netgraph import NetGraph
+from netplanner import NetPlanner, calc_expected_times
+
+# Seeded synthetic activity networks with one source and one runoff. Every
+# generator returns a project in Serializer's column form, so it can be saved,
+# converted or turned into a planner with NetPlanner.from_project_data
+
+
+def layered_network(events_count, rng, extra_tasks=1.0):
+    # Inner events in about sqrt(n) layers of about sqrt(n) events; every event is
+    # reached from a random event of the previous layer, extra_tasks more tasks per
+    # event on average, and leads to at least one event of the next layer
+    inner = events_count - 2
+    if not inner:
+        return np.array([[0], [1]], dtype=np.int64)
+    width = max(1, int(round(np.sqrt(inner))))
+    events = np.arange(1, inner + 1)
+    layer = (events - 1) // width
+    layers_count = int(layer[-1]) + 1
+
+    def random_in_layer(layers):
+        first = layers * width + 1
+        return first + rng.integers(0, np.minimum(width, inner + 1 - first))
+
+    start_events = [np.zeros(np.count_nonzero(layer == 0), dtype=np.int64), random_in_layer(layer[layer > 0] - 1)]
+    end_events = [events[layer == 0], events[layer > 0]]
+    extra_ends = rng.choice(events[layer > 0], int(extra_tasks * np.count_nonzero(layer > 0))) \
+        if layers_count > 1 else np.zeros(0, dtype=np.int64)
+    start_events.append(random_in_layer(layer[extra_ends - 1] - 1))
+    end_events.append(extra_ends)
+    last = events[layer == layers_count - 1]
+    start_events.append(last)
+    end_events.append(np.full(len(last), events_count - 1))
+
+    start_events, end_events = np.concatenate(start_events), np.concatenate(end_events)
+    no_successors = np.setdiff1d(events[layer < layers_count - 1], start_events)
+    start_events = np.concatenate([start_events, no_successors])
+    end_events = np.concatenate([end_events, random_in_layer(layer[no_successors - 1] + 1)])
+    return np.unique(np.stack([start_events, end_events], axis=1), axis=0).T
+
+
+def series_parallel_network(events_count, rng):
+    # Starting from one source -> runoff task, every new event either splits a
+    # random task in two (series) or adds a two-task path next to it (parallel)
+    tasks = [(0, events_count - 1)]
+    for event in range(1, events_count - 1):
+        index = int(rng.integers(len(tasks)))
+        start_event, end_event = tasks[index]
+        if rng.random() < 0.5:
+            tasks[index] = (start_event, event)
+        else:
+            tasks.append((start_event, event))
+        tasks.append((event, end_event))
+    return np.array(tasks, dtype=np.int64).T
+
+
+def dense_mesh_network(events_count, rng, degree=8, window=50):
+    # A chain through all events, plus degree tasks from every event to random
+    # events among the next window ones
+    events = np.arange(events_count - 1)
+    extra_starts = np.repeat(events, degree)
+    extra_ends = np.minimum(extra_starts + rng.integers(1, window + 1, len(extra_starts)), events_count - 1)
+    start_events = np.concatenate([events, extra_starts])
+    end_events = np.concatenate([events + 1, extra_ends])
+    return np.unique(np.stack([start_events, end_events], axis=1), axis=0).T
+
+
+NETWORKS = {
+    'layered': layered_network,
+    'series-parallel': series_parallel_network,
+    'dense-mesh': dense_mesh_network
+}
+
+
+def generate_project(kind, events_count, seed=0, use3mark_system=False):
+    if kind not in NETWORKS:
+        raise Exception('Unknown network kind')
+    if events_count < 2:
+        raise Exception('Network needs at least 2 events')
+    rng = np.random.default_rng(seed)
+    start_events, end_events = NETWORKS[kind](events_count, rng)
+    tasks_count = len(start_events)
+
+    tasks_early = rng.uniform(1, 10, tasks_count).round(1)
+    tasks_late = (tasks_early + rng.uniform(0, 10, tasks_count)).round(1)
+    tasks_possible = rng.uniform(tasks_early, tasks_late).round(1)
+    # Directive limits around the expected early times, so probabilities spread over (0, 1)
+    task_exp = calc_expected_times(use3mark_system, tasks_early, tasks_late, tasks_possible)[0]
+    t_early = NetGraph(events_count, start_events, end_events).calc_early_times(task_exp)
+    events_time_limits = (t_early * rng.uniform(0.9, 1.2, events_count)).round(1)
+
+    tasks_columns = [start_events, end_events, tasks_early, tasks_late]
+    if use3mark_system:
+        tasks_columns.append(tasks_possible)
+    return {
+        'tasks_quantity': tasks_count,
+        'events_quantity': events_count,
+        'use3mark_system': use3mark_system,
+        'tasks_params_columns': tasks_columns,
+        'event_params_columns': [events_time_limits]
+    }
+
+
+def generate_planner(kind, events_count, seed=0, use3mark_system=False):
+    return NetPlanner.from_project_data(generate_project(kind, events_count, seed, use3mark_system))
@@ -0,0 +1,473 @@
+import numpy as np
+import heapq
+from normal import clark_max, clark_max_scalar
+
+TIME_EPSILON = 1e-9
+# Scenario batches are chunked to keep their arrays within this many bytes
+MEMORY_BUDGET = 64 * 2**20
+VECTORIZED_LEVEL_WIDTH = 32
+
+
+class NetGraph:
+    def __init__(self, events_count, tasks_start_events, tasks_end_events):
+        self.events_count = events_count
+        self.tasks_start_events = np.asarray(tasks_start_events, dtype=np.int64)
+        self.tasks_end_events = np.asarray(tasks_end_events, dtype=np.int64)
+        if len(self.tasks_start_events) != len(self.tasks_end_events):
+            raise Exception('Tasks start events doesnt match')
+        self.tasks_count = len(self.tasks_start_events)
+        if self.tasks_count and (min(self.tasks_start_events.min(), self.tasks_end_events.min()) < 0 or
+                                 max(self.tasks_start_events.max(), self.tasks_end_events.max()) >= events_count):
+            raise Exception('Tasks events number is not valid')
+
+        # CSR layout: tasks leaving event i are succ_tasks[succ_ptr[i]:succ_ptr[i + 1]],
+        # tasks entering it are pred_tasks[pred_ptr[i]:pred_ptr[i + 1]]
+        self.succ_ptr, self.succ_tasks = self.__build_csr(self.tasks_start_events, self.tasks_end_events)
+        self.succ_events = self.tasks_end_events[self.succ_tasks]
+        self.pred_ptr, self.pred_tasks = self.__build_csr(self.tasks_end_events, self.tasks_start_events)
+        self.pred_events = self.tasks_start_events[self.pred_tasks]
+
+        self.__levels = None
+        self.__order = None
+        self.__position = None
+        self.__event_level = None
+        self.__levels_count = 0
+        self.__relaxations = dict()
+        # Task relaxations done by the propagation passes, one per task and scenario
+        self.relaxations_count = 0
+
+    def __build_csr(self, keys, neighbours):
+        ptr = np.zeros(self.events_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=self.events_count), out=ptr[1:])
+        return ptr, np.lexsort((neighbours, keys))
+
+    def out_degree(self):
+        return np.diff(self.succ_ptr)
+
+    def in_degree(self):
+        return np.diff(self.pred_ptr)
+
+    def successors(self, event):
+        return [self.succ_events[self.succ_ptr[event]:self.succ_ptr[event + 1]],
+                self.succ_tasks[self.succ_ptr[event]:self.succ_ptr[event + 1]]]
+
+    def predecessors(self, event):
+        return [self.pred_events[self.pred_ptr[event]:self.pred_ptr[event + 1]],
+                self.pred_tasks[self.pred_ptr[event]:self.pred_ptr[event + 1]]]
+
+    def __kahn(self):
+        # Kahn's algorithm; the level of an event is one more than the highest level
+        # among its predecessors, so tasks entering a level all start below it.
+        # Events on or behind a cycle never make it into the order
+        succ_ptr, succ_events = self.succ_ptr.tolist(), self.succ_events.tolist()
+        in_degree = self.in_degree().tolist()
+        event_level = [0 for i in range(self.events_count)]
+        order = [i for i in range(self.events_count) if in_degree[i] == 0]
+        for event in order:
+            level = event_level[event] + 1
+            for k in range(succ_ptr[event], succ_ptr[event + 1]):
+                next_event = succ_events[k]
+                if event_level[next_event] < level:
+                    event_level[next_event] = level
+                in_degree[next_event] -= 1
+                if in_degree[next_event] == 0:
+                    order.append(next_event)
+        return [order, event_level]
+
+    def levels(self):
+        if self.__levels is None:
+            order, event_level = self.__kahn()
+            if len(order) != self.events_count:
+                raise Exception('System has cycles. Data is incorrect')
+
+            self.__event_level = np.array(event_level, dtype=np.int64)
+            self.__order = np.array(order, dtype=np.int64)
+            self.__position = np.empty(self.events_count, dtype=np.int64)
+            self.__position[self.__order] = np.arange(self.events_count)
+            self.__levels_count = int(self.__event_level.max()) + 1 if self.events_count else 0
+            events = np.argsort(self.__event_level, kind='stable')
+            self.__levels = self.__split_by_level(events, self.__event_level[events])
+        return self.__levels
+
+    def __cyclic_components(self, remaining):
+        # Strongly connected components (Tarjan's algorithm, iterative) among the
+        # events left out of Kahn's order that hold a cycle: more than one event,
+        # or one with a task looping back to it
+        succ_ptr, succ_events = self.succ_ptr.tolist(), self.succ_events.tolist()
+        index = [-1 for i in range(self.events_count)]
+        low = [0 for i in range(self.events_count)]
+        on_stack = [False for i in range(self.events_count)]
+        stack = []
+        components = []
+        counter = 0
+        for root in np.flatnonzero(remaining).tolist():
+            if index[root] >= 0:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [[root, succ_ptr[root]]]
+            while work:
+                event, k = work[-1]
+                if k < succ_ptr[event + 1]:
+                    work[-1][1] += 1
+                    next_event = succ_events[k]
+                    if not remaining[next_event]:
+                        continue
+                    if index[next_event] < 0:
+                        index[next_event] = low[next_event] = counter
+                        counter += 1
+                        stack.append(next_event)
+                        on_stack[next_event] = True
+                        work.append([next_event, succ_ptr[next_event]])
+                    elif on_stack[next_event]:
+                        low[event] = min(low[event], index[next_event])
+                    continue
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[event])
+                if low[event] == index[event]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == event:
+                            break
+                    if len(component) > 1 or event in succ_events[succ_ptr[event]:succ_ptr[event + 1]]:
+                        components.append(sorted(component))
+        return sorted(components)
+
+    def find_cycles(self):
+        # One cycle in task direction, from its lowest event, for every strongly
+        # connected group of events that has cycles; empty for an acyclic network. Every event of such a
+        # group has a predecessor in it, so walking back over those must come
+        # round to an event already visited
+        order = self.__kahn()[0]
+        if len(order) == self.events_count:
+            return []
+        remaining = np.ones(self.events_count, dtype=bool)
+        remaining[order] = False
+        cycles = []
+        for component in self.__cyclic_components(remaining):
+            inside = np.zeros(self.events_count, dtype=bool)
+            inside[component] = True
+            visited = dict()
+            path = []
+            event = component[0]
+            while event not in visited:
+                visited[event] = len(path)
+                path.append(event)
+                predecessors = self.pred_events[self.pred_ptr[event]:self.pred_ptr[event + 1]]
+                event = int(predecessors[inside[predecessors]][0])
+            cycle = path[visited[event]:][::-1]
+            first = cycle.index(min(cycle))
+            cycles.append(cycle[first:] + cycle[:first])
+        return cycles
+
+    def validate(self):
+        # Structural report in O(V + E): sources, sinks, isolated events and a cycle
+        # in each group of events that has cycles. messages is empty for a network with one source, one
+        # sink and no cycles; the topological order is then cached for the passes
+        in_degree, out_degree = self.in_degree(), self.out_degree()
+        isolated = (in_degree == 0) & (out_degree == 0)
+        if self.events_count == 1:
+            isolated[:] = False
+        report = {
+            'sources': np.flatnonzero((in_degree == 0) & ~isolated).tolist(),
+            'sinks': np.flatnonzero((out_degree == 0) & ~isolated).tolist(),
+            'isolated': np.flatnonzero(isolated).tolist(),
+            'cycles': [],
+            'order': None,
+            'messages': []
+        }
+        try:
+            report['order'] = self.topological_order()
+        except Exception:
+            report['cycles'] = self.find_cycles()
+        messages = report['messages']
+        if report['isolated']:
+            messages.append('Events %s have no tasks. Data is incorrect' % ', '.join(map(str, report['isolated'])))
+        for name, events in [('sources', report['sources']), ('runoffs', report['sinks'])]:
+            if not events:
+                messages.append('System has no %s. Data is incorrect' % name)
+            elif len(events) > 1:
+                messages.append('System has multiple %s: %s. Data is incorrect' % (name, ', '.join(map(str, events))))
+        if report['cycles']:
+            cycles = ['; '.join(' -> '.join(map(str, i + i[:1])) for i in report['cycles'][:10])]
+            if len(report['cycles']) > 10:
+                cycles.append('and %d more' % (len(report['cycles']) - 10))
+            messages.append('System has cycles: %s. Data is incorrect' % '; '.join(cycles))
+        return report
+
+    def __split_by_level(self, items, items_level):
+        # items come ordered by level, items_level holds the level of each of them
+        return np.split(items, np.searchsorted(items_level, np.arange(1, self.__levels_count)))
+
+    def topological_order(self):
+        self.levels()
+        return self.__order
+
+    def event_levels(self):
+        self.levels()
+        return self.__event_level
+
+    def __level_relaxations(self, forward):
+        # Per level: tasks entering (forward) or leaving (backward) its events, sorted
+        # by that event, with the event of every run and the offset where it starts,
+        # ready for np.maximum.reduceat
+        if forward not in self.__relaxations:
+            own_events = self.tasks_end_events if forward else self.tasks_start_events
+            tasks = np.lexsort((own_events, self.__event_level[own_events]))
+            sorted_events = own_events[tasks]
+            runs = np.flatnonzero(np.diff(sorted_events, prepend=-1) != 0)
+            relaxations = []
+            for level_tasks, level_runs in zip(self.__split_by_level(tasks, self.__event_level[sorted_events]),
+                                               self.__split_by_level(runs, self.__event_level[sorted_events[runs]])):
+                if len(level_tasks):
+                    relaxations.append((level_tasks, sorted_events[level_runs], level_runs - level_runs[0]))
+            self.__relaxations[forward] = relaxations if forward else relaxations[::-1]
+        return self.__relaxations[forward]
+
+    def __propagate(self, values, durations, forward):
+        # values[event] = max(values[event], values[neighbour] + durations[task]) over
+        # the tasks entering (forward) or leaving (backward) each event; values and
+        # durations may carry a trailing scenarios axis
+        self.levels()
+        self.relaxations_count += self.tasks_count * (values.size // max(self.events_count, 1))
+        neighbour_events = self.tasks_start_events if forward else self.tasks_end_events
+        if values.ndim > 1 or self.tasks_count >= VECTORIZED_LEVEL_WIDTH * len(self.__levels):
+            for tasks, events, runs in self.__level_relaxations(forward):
+                candidates = np.maximum.reduceat(values[neighbour_events[tasks]] + durations[tasks], runs)
+                values[events] = np.maximum(values[events], candidates)
+            return values
+
+        # Deep and narrow networks: a plain loop is cheaper than a few NumPy calls per level
+        if forward:
+            ptr, csr_tasks, order = self.pred_ptr.tolist(), self.pred_tasks.tolist(), self.__order.tolist()
+        else:
+            ptr, csr_tasks, order = self.succ_ptr.tolist(), self.succ_tasks.tolist(), self.__order[::-1].tolist()
+        neighbour_events, durations, values_list = neighbour_events.tolist(), durations.tolist(), values.tolist()
+        for event in order:
+            best = values_list[event]
+            for k in range(ptr[event], ptr[event + 1]):
+                task = csr_tasks[k]
+                candidate = values_list[neighbour_events[task]] + durations[task]
+                if candidate > best:
+                    best = candidate
+            values_list[event] = best
+        values[:] = values_list
+        return values
+
+    def calc_early_times(self, durations, start_event=None):
+        # Longest path from the start event (every source when omitted) to each event
+        t_early = np.full((self.events_count,) + np.shape(durations)[1:], -np.inf)
+        if start_event is None:
+            t_early[self.in_degree() == 0] = 0
+        else:
+            t_early[start_event] = 0
+        return self.__propagate(t_early, durations, True)
+
+    def calc_tail_times(self, durations):
+        # Longest path from each event to a sink
+        t_tail = np.full((self.events_count,) + np.shape(durations)[1:], -np.inf)
+        t_tail[self.out_degree() == 0] = 0
+        return self.__propagate(t_tail, durations, False)
+
+    def calc_critical_weights(self, durations, dispersion, t_early, tasks=slice(None)):
+        # Dispersion of tasks lying on a longest path to their end event, -inf elsewhere
+        critical = (t_early[self.tasks_start_events[tasks]] + durations[tasks] >=
+                    t_early[self.tasks_end_events[tasks]] - TIME_EPSILON)
+        return np.where(critical, dispersion[tasks], -np.inf)
+
+    def calc_critical_dispersion(self, durations, dispersion, t_early):
+        # Dispersion accumulated along the longest path to each event: a longest-path
+        # pass over dispersions that only lets through tasks lying on a longest path,
+        # so among tasks tying for the early time the larger dispersion wins
+        return self.calc_early_times(self.calc_critical_weights(durations, dispersion, t_early))
+
+    def calc_clark_moments(self, durations, dispersion):
+        # Mean and variance of every event's completion time with task times taken
+        # as normals: moments add up along a task, and the arrivals at an event are
+        # folded pairwise into their max with Clark's formulas. Two arrivals are
+        # taken to share the history of the nearest common ancestor of their start
+        # events in the tree of dominant predecessors (the start event of the
+        # arrival with the largest mean), whose variance is their covariance
+        self.levels()
+        self.relaxations_count += self.tasks_count * (np.size(durations) // max(self.tasks_count, 1))
+        if np.ndim(durations) > 1 or self.tasks_count >= VECTORIZED_LEVEL_WIDTH * len(self.__levels):
+            return self.__clark_levels(durations, dispersion)
+        return self.__clark_loop(durations, dispersion)
+
+    def __clark_levels(self, durations, dispersion):
+        # Step k of a level merges the k-th entering task of each of its events;
+        # every scenario has its own dominant predecessors tree
+        shape = (self.events_count,) + np.shape(durations)[1:]
+        durations = np.asarray(durations, dtype=np.float64).reshape(self.tasks_count, -1)
+        dispersion = np.asarray(dispersion, dtype=np.float64).reshape(self.tasks_count, -1)
+        columns = np.arange(durations.shape[1])
+        mean = np.zeros((self.events_count, len(columns)))
+        variance = np.zeros_like(mean)
+        tree = [np.repeat(np.arange(self.events_count)[:, None], len(columns), axis=1) for i in range(2)] + \
+            [np.zeros(mean.shape, dtype=np.int64)]
+        parent, jump, depth = tree
+        in_degree = self.in_degree()
+        for events in self.__levels[1:]:
+            degree = in_degree[events]
+            best = np.zeros((len(events), len(columns)), dtype=np.int64)
+            best_mean = np.zeros(best.shape)
+            for k in range(int(degree.max())):
+                rows = np.flatnonzero(degree > k)
+                merged = events[rows]
+                tasks = self.pred_tasks[self.pred_ptr[merged] + k]
+                starts = np.repeat(self.tasks_start_events[tasks][:, None], len(columns), axis=1)
+                arrival_mean = mean[starts, columns] + durations[tasks]
+                arrival_variance = variance[starts, columns] + dispersion[tasks]
+                if k:
+                    common = self.__common_ancestors(tree, best[rows], starts, columns)
+                    covariance = np.where(common >= 0, variance[np.maximum(common, 0), columns], 0)
+                    mean[merged], variance[merged] = clark_max(mean[merged], variance[merged], arrival_mean,
+                                                               arrival_variance, covariance)
+                    dominant = arrival_mean > best_mean[rows]
+                else:
+                    mean[merged], variance[merged] = arrival_mean, arrival_variance
+                    dominant = np.ones(starts.shape, dtype=bool)
+                best[rows] = np.where(dominant, starts, best[rows])
+                best_mean[rows] = np.where(dominant, arrival_mean, best_mean[rows])
+            # Skew-binary jump pointers (Myers), so ancestors are found in O(log depth)
+            jump_best = jump[best, columns]
+            skip = depth[best, columns] - depth[jump_best, columns] == \
+                depth[jump_best, columns] - depth[jump[jump_best, columns], columns]
+            parent[events] = best
+            jump[events] = np.where(skip, jump[jump_best, columns], best)
+            depth[events] = depth[best, columns] + 1
+        return [mean.reshape(shape), variance.reshape(shape)]
+
+    def __common_ancestors(self, tree, a, b, columns):
+        # Nearest common ancestors in the dominant predecessors trees, -1 where
+        # a and b have none (they come from different sources)
+        parent, jump, depth = tree
+
+        def lift(events, target_depth):
+            while True:
+                active = depth[events, columns] > target_depth
+                if not active.any():
+                    return events
+                jumped = jump[events, columns]
+                events = np.where(active, np.where(depth[jumped, columns] >= target_depth, jumped,
+                                                   parent[events, columns]), events)
+
+        target_depth = np.minimum(depth[a, columns], depth[b, columns])
+        a, b = lift(a, target_depth), lift(b, target_depth)
+        # At equal depths jump pointers land at equal depths too
+        while True:
+            active = (a != b) & (depth[a, columns] > 0)
+            if not active.any():
+                return np.where(a == b, a, -1)
+            jumped_a, jumped_b = jump[a, columns], jump[b, columns]
+            step = jumped_a != jumped_b
+            a = np.where(active, np.where(step, jumped_a, parent[a, columns]), a)
+            b = np.where(active, np.where(step, jumped_b, parent[b, columns]), b)
+
+    def __clark_loop(self, durations, dispersion):
+        # Deep and narrow networks: the same merges in a plain loop
+        ptr, pred_tasks, order = self.pred_ptr.tolist(), self.pred_tasks.tolist(), self.__order.tolist()
+        start_events = self.tasks_start_events.tolist()
+        durations, dispersion = np.asarray(durations).tolist(), np.asarray(dispersion).tolist()
+        mean, variance = [0.0] * self.events_count, [0.0] * self.events_count
+        tree = AncestorTree(self.events_count)
+        for event in order:
+            best = -1
+            for k in range(ptr[event], ptr[event + 1]):
+                task = pred_tasks[k]
+                start = start_events[task]
+                arrival_mean = mean[start] + durations[task]
+                arrival_variance = variance[start] + dispersion[task]
+                if best < 0:
+                    mean[event], variance[event] = arrival_mean, arrival_variance
+                    best, best_mean = start, arrival_mean
+                    continue
+                common = tree.common_ancestor(best, start)
+                mean[event], variance[event] = clark_max_scalar(mean[event], variance[event], arrival_mean,
+                                                                arrival_variance, variance[common] if common >= 0
+                                                                else 0.0)
+                if arrival_mean > best_mean:
+                    best, best_mean = start, arrival_mean
+            if best >= 0:
+                tree.attach(event, best)
+        return [np.array(mean), np.array(variance)]
+
+    def incident_tasks(self, events):
+        events = np.asarray(events, dtype=np.int64)
+        return np.unique(np.concatenate([np.zeros(0, dtype=np.int64)] +
+                                        [self.succ_tasks[self.succ_ptr[i]:self.succ_ptr[i + 1]] for i in events] +
+                                        [self.pred_tasks[self.pred_ptr[i]:self.pred_ptr[i + 1]] for i in events]))
+
+    def repropagate(self, values, durations, events, forward=True):
+        # Incremental counterpart of calc_early_times (forward) / calc_tail_times
+        # (backward) after durations of tasks entering (leaving) the given events
+        # changed: only events whose value actually moves pass the change on.
+        # values are updated in place, the events that changed are returned
+        self.levels()
+        if forward:
+            ptr, csr_tasks, neighbour_events = self.pred_ptr, self.pred_tasks, self.tasks_start_events
+            next_ptr, next_events, sign = self.succ_ptr, self.succ_events, 1
+        else:
+            ptr, csr_tasks, neighbour_events = self.succ_ptr, self.succ_tasks, self.tasks_end_events
+            next_ptr, next_events, sign = self.pred_ptr, self.pred_events, -1
+
+        queued = set(int(i) for i in events)
+        queue = [(sign * int(self.__position[i]), i) for i in queued]
+        heapq.heapify(queue)
+        changed = []
+        while queue:
+            event = heapq.heappop(queue)[1]
+            queued.discard(event)
+            tasks = csr_tasks[ptr[event]:ptr[event + 1]]
+            self.relaxations_count += len(tasks)
+            if not len(tasks):
+                continue
+            best = (values[neighbour_events[tasks]] + durations[tasks]).max()
+            if best == values[event]:
+                continue
+            values[event] = best
+            changed.append(event)
+            for next_event in next_events[next_ptr[event]:next_ptr[event + 1]].tolist():
+                if next_event not in queued:
+                    queued.add(next_event)
+                    heapq.heappush(queue, (sign * int(self.__position[next_event]), next_event))
+        return changed
+
+
+class AncestorTree:
+    # Tree grown a leaf at a time, every node starting as a root of its own, with
+    # skew-binary jump pointers (Myers), so the nearest common ancestor of two
+    # nodes is found in O(log depth) with one extra pointer per node
+    def __init__(self, nodes_count):
+        self.parent = list(range(nodes_count))
+        self.jump = list(range(nodes_count))
+        self.depth = [0] * nodes_count
+
+    def attach(self, node, parent):
+        jump, depth = self.jump, self.depth
+        self.parent[node], depth[node] = parent, depth[parent] + 1
+        if depth[parent] - depth[jump[parent]] == depth[jump[parent]] - depth[jump[jump[parent]]]:
+            jump[node] = jump[jump[parent]]
+        else:
+            jump[node] = parent
+
+    def common_ancestor(self, a, b):
+        # -1 when a and b are in different trees
+        parent, jump, depth = self.parent, self.jump, self.depth
+        if depth[a] < depth[b]:
+            a, b = b, a
+        while depth[a] > depth[b]:
+            a = jump[a] if depth[jump[a]] >= depth[b] else parent[a]
+        # At equal depths jump pointers land at equal depths too
+        while a != b and depth[a] > 0:
+            if jump[a] != jump[b]:
+                a, b = jump[a], jump[b]
+            else:
+                a, b = parent[a], parent[b]
+        return a if a == b else -1
@@ -1,193 +1,492 @@
 import numpy as np
-from scipy import stats as st
 import math
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from functools import cached_property
+from netgraph import NetGraph, TIME_EPSILON, MEMORY_BUDGET
+from normal import norm_cdf
+from profiler import DISABLED_STAGE
+
+
+def calc_expected_times(use_3_marks_method, tasks_early, tasks_late, tasks_possible=None, decimals=4):
+    # Expected times and dispersions of tasks; works elementwise on arrays of any shape.
+    # decimals=None leaves them unrounded
+    if use_3_marks_method:
+        tasks_expected = (1/6)*(tasks_early + 4*tasks_possible + tasks_late)
+        dispersion = (1/36)*(tasks_late - tasks_early)**2
+    else:
+        tasks_expected = (1/5)*(3*tasks_early + 2*tasks_late)
+        dispersion = (1/25)*(tasks_late - tasks_early)**2
+    if decimals is None:
+        return [tasks_expected, dispersion]
+    return [np.round(tasks_expected, decimals), np.round(dispersion, decimals)]
+
+
+def read_only(*arrays):
+    # Cached results are handed out as they are, so they are locked against writes
+    for array in arrays:
+        array.setflags(write=False)
+    return arrays[0] if len(arrays) == 1 else list(arrays)
+
+
+class NetAnalysis:
+    # Everything derived from one set of planner inputs, computed on first use;
+    # NetPlanner.invalidate() replaces the whole object when inputs change.
+    # Arrays are read-only and updates replace them, so results a caller holds
+    # never change under it
+    def __init__(self, planner):
+        self.planner = planner
+        self.graph = planner.graph
+        self.__events_dispersion = dict()
+
+    def __calc_expected_times(self, tasks=slice(None)):
+        planner = self.planner
+        return calc_expected_times(planner.use_3_marks_method, planner.tasks_early[tasks], planner.tasks_late[tasks],
+                                   planner.tasks_possible[tasks] if planner.use_3_marks_method else None)
+
+    @cached_property
+    def expected_times(self):
+        with self.planner.stage('expected_times'):
+            return read_only(*self.__calc_expected_times())
+
+    @property
+    def task_exp(self):
+        return self.expected_times[0]
+
+    @property
+    def dispersion(self):
+        return self.expected_times[1]
+
+    @cached_property
+    def topological_order(self):
+        return self.graph.topological_order()
+
+    @cached_property
+    def t_early(self):
+        # Longest source -> event path
+        task_exp = self.task_exp
+        with self.planner.stage('longest_paths'):
+            return read_only(self.graph.calc_early_times(task_exp))
+
+    @cached_property
+    def t_tail(self):
+        # Longest event -> runoff path
+        task_exp = self.task_exp
+        with self.planner.stage('longest_paths'):
+            return read_only(self.graph.calc_tail_times(task_exp))
+
+    @property
+    def t_cr(self):
+        return self.t_early[self.planner.runoff]
+
+    @cached_property
+    def t_late(self):
+        t_late = self.t_cr - self.t_tail
+        t_late[self.planner.source] = 0
+        t_late[self.planner.runoff] = self.t_cr
+        return read_only(t_late)
+
+    @cached_property
+    def critical_path(self):
+        return next(self.planner.iter_critical_paths())
+
+    @cached_property
+    def clark_moments(self):
+        return read_only(*self.graph.calc_clark_moments(self.task_exp, self.dispersion))
+
+    def events_mean(self, mode):
+        # Expected completion time of events the probabilities are taken around
+        return self.clark_moments[0] if mode == 'clark' else self.t_early
+
+    def events_dispersion(self, mode):
+        # 'max' takes the largest dispersion over every source -> event path,
+        # 'critical' carries it along the longest expected path to each event
+        # (larger dispersion wins ties), 'clark' matches the moments of the max
+        # of the arrivals at every merge event
+        if mode == 'clark':
+            return self.clark_moments[1]
+        if mode not in self.__events_dispersion:
+            if mode == 'max':
+                self.__events_dispersion[mode] = read_only(self.graph.calc_early_times(self.dispersion))
+            elif mode == 'critical':
+                self.__events_dispersion[mode] = read_only(self.graph.calc_early_times(self.critical_weights))
+            else:
+                raise Exception('Unknown dispersion mode')
+        return self.__events_dispersion[mode]
+
+    @cached_property
+    def critical_weights(self):
+        return read_only(self.graph.calc_critical_weights(self.task_exp, self.dispersion, self.t_early))
+
+    def update_tasks(self, tasks):
+        # Brings whatever is already computed up to date with new estimates of the
+        # given tasks, re-propagating only from the events those tasks touch. The
+        # cached arrays are copied before the update, as callers may hold them
+        cached = self.__dict__
+        if 'expected_times' not in cached:
+            return
+        task_exp, dispersion = [i.copy() for i in self.expected_times]
+        start_events, end_events = self.graph.tasks_start_events, self.graph.tasks_end_events
+        new_task_exp, new_dispersion = self.__calc_expected_times(tasks)
+        exp_changed = tasks[new_task_exp != task_exp[tasks]]
+        dispersion_changed = tasks[new_dispersion != dispersion[tasks]]
+        task_exp[tasks] = new_task_exp
+        dispersion[tasks] = new_dispersion
+        cached['expected_times'] = read_only(task_exp, dispersion)
+
+        early_changed = []
+        if 't_early' in cached:
+            t_early = self.t_early.copy()
+            early_changed = self.graph.repropagate(t_early, task_exp, end_events[exp_changed])
+            cached['t_early'] = read_only(t_early)
+        if 't_tail' in cached:
+            t_tail = self.t_tail.copy()
+            self.graph.repropagate(t_tail, task_exp, start_events[exp_changed], False)
+            cached['t_tail'] = read_only(t_tail)
+        cached.pop('t_late', None)
+        cached.pop('critical_path', None)
+        # One pass over the network, so simply recomputed when needed
+        cached.pop('clark_moments', None)
+
+        if 'max' in self.__events_dispersion:
+            events_dispersion = self.__events_dispersion['max'].copy()
+            self.graph.repropagate(events_dispersion, dispersion, end_events[dispersion_changed])
+            self.__events_dispersion['max'] = read_only(events_dispersion)
+        if 'critical_weights' in cached:
+            rechecked = np.unique(np.concatenate([exp_changed, dispersion_changed,
+                                                  self.graph.incident_tasks(early_changed)]))
+            weights = self.graph.calc_critical_weights(task_exp, dispersion, self.t_early, rechecked)
+            moved = rechecked[weights != self.critical_weights[rechecked]]
+            critical_weights = self.critical_weights.copy()
+            critical_weights[rechecked] = weights
+            cached['critical_weights'] = read_only(critical_weights)
+            if 'critical' in self.__events_dispersion:
+                events_dispersion = self.__events_dispersion['critical'].copy()
+                self.graph.repropagate(events_dispersion, critical_weights, end_events[moved])
+                self.__events_dispersion['critical'] = read_only(events_dispersion)
 
 
 class NetPlanner:
     def __init__(self, tasks_count, events_count, use_3_marks_method, tasks_early,
-                 tasks_late, tasks_start_events, tasks_end_events, events_time_limits, tasks_possible=[]):
+                 tasks_late, tasks_start_events, tasks_end_events, events_time_limits, tasks_possible=[],
+                 profiler=None):
+        # profiler: a StageProfiler collecting per-stage times and counters, or None
+        self.profiler = profiler
         self.tasks_count = tasks_count
         self.events_count = events_count
         self.use_3_marks_method = use_3_marks_method
         if len(tasks_early) != self.tasks_count:
             raise Exception('Early tasks length doesnt match')
-        self.tasks_early = tasks_early
+        self.tasks_early = np.array(tasks_early, dtype=np.float64)
         if len(tasks_late) != self.tasks_count:
             raise Exception('Late tasks length doesnt match')
-        self.tasks_late = tasks_late
+        self.tasks_late = np.array(tasks_late, dtype=np.float64)
         if len(tasks_early) != self.tasks_count:
             raise Exception('Early tasks length doesnt match')
         if len(events_time_limits) != self.events_count:
             raise Exception('Event time limits doesnt match')
-        self.events_time_limits = events_time_limits
+        self.events_time_limits = np.array(events_time_limits, dtype=np.float64)
         if self.use_3_marks_method and len(tasks_possible) != self.tasks_count:
             raise Exception('Most possible vector doesnt match')
-        self.tasks_possible = tasks_possible
+        self.tasks_possible = np.array(tasks_possible if tasks_possible is not None else [], dtype=np.float64)
         if len(tasks_start_events) != len(tasks_end_events) or len(tasks_start_events) != self.tasks_count:
             raise Exception('Tasks start events doesnt match')
 
-        self.tasks_events = [[-1 for x in range(self.events_count)] for y in range(self.events_count)]
-
-        for i in range(len(tasks_start_events)):
-            if tasks_start_events[i] >= self.events_count or tasks_end_events[i] >= \
-                    self.events_count or tasks_start_events[i] < 0 or tasks_end_events[i] < 0:
-                raise Exception('Tasks events number is not valid')
-            self.tasks_events[tasks_start_events[i]][tasks_end_events[i]] = i
-
         self.tasks_start_events = tasks_start_events
         self.tasks_end_events = tasks_end_events
+        self.graph = NetGraph(self.events_count, tasks_start_events, tasks_end_events)
         self.source, self.runoff = self.__calc_endpoints()
-        self.task_exp, self.dispersion = self.calc_t_exp()
+        self.analysis = NetAnalysis(self)
 
-    def calc_t_exp(self):
-        if self.use_3_marks_method:
-            tasks_expected = [round((1/6)*(self.tasks_early[i] + 4 *
-                                          self.tasks_possible[i] + self.tasks_late[i]), 4) for i in range(self.tasks_count)]
-            dispersion = [round((1/36)*(self.tasks_late[i] - self.tasks_early[i])**2, 4) for i in range(self.tasks_count)]
+    @classmethod
+    def from_project_data(cls, data, profiler=None):
+        # data is a project loaded by Serializer: task rows are [start event, end event,
+        # optimistic, pessimistic(, most possible)], event rows are [directive limit].
+        # Binary projects come in the column form with the same columns as arrays
+        use_3_marks_method = bool(data['use3mark_system'])
+        if 'tasks_params_columns' in data:
+            tasks = data['tasks_params_columns']
+            events = data['event_params_columns']
         else:
-            tasks_expected = [round((1/5)*(3*self.tasks_early[i] + 2*self.tasks_late[i]), 4) for i in range(self.tasks_count)]
-            dispersion = [round((1/25)*(self.tasks_late[i] - self.tasks_early[i])**2, 4) for i in range(self.tasks_count)]
-        return [tasks_expected, dispersion]
+            tasks = np.array(data['tasks_params_model_data'], dtype=np.float64)
+            events = np.array(data['event_params_model_data'], dtype=np.float64)
+            if tasks.ndim != 2 or events.ndim != 2:
+                raise Exception('Project has no tasks or events')
+            tasks, events = tasks.T, events.T
+        return cls(int(data['tasks_quantity']), int(data['events_quantity']), use_3_marks_method,
+                   tasks[2], tasks[3], np.asarray(tasks[0]).astype(np.int64), np.asarray(tasks[1]).astype(np.int64),
+                   events[0], tasks[4] if use_3_marks_method else None, profiler)
+
+    def invalidate(self, topology=False):
+        if topology:
+            self.graph = NetGraph(self.events_count, self.tasks_start_events, self.tasks_end_events)
+            self.source, self.runoff = self.__calc_endpoints()
+        self.analysis = NetAnalysis(self)
+
+    def stage(self, name):
+        # Profiled block of work, a shared no-op context without a profiler
+        if self.profiler is None:
+            return DISABLED_STAGE
+        return self.__profiled_stage(name)
+
+    @contextmanager
+    def __profiled_stage(self, name):
+        relaxations = self.graph.relaxations_count
+        try:
+            with self.profiler.stage(name):
+                yield self.profiler
+        finally:
+            if self.graph.relaxations_count != relaxations:
+                self.profiler.count(name, 'relaxations', self.graph.relaxations_count - relaxations)
+
+    def update_tasks(self, tasks, early=None, late=None, possible=None):
+        # New estimates for some tasks; already computed results are updated
+        # incrementally instead of being recalculated from scratch
+        tasks = np.atleast_1d(np.asarray(tasks, dtype=np.int64))
+        if early is not None:
+            self.tasks_early[tasks] = early
+        if late is not None:
+            self.tasks_late[tasks] = late
+        if possible is not None:
+            if not self.use_3_marks_method:
+                raise Exception('Most possible marks are used by the 3 marks method only')
+            self.tasks_possible[tasks] = possible
+        with self.stage('incremental_update'):
+            self.analysis.update_tasks(tasks)
+
+    @property
+    def task_exp(self):
+        return self.analysis.task_exp
+
+    @property
+    def dispersion(self):
+        return self.analysis.dispersion
+
+    def calc_t_exp(self):
+        return [self.analysis.task_exp, self.analysis.dispersion]
 
     def __calc_endpoints(self):
-        runoffs = list(filter(lambda x: len(list(filter(lambda y: y != -1, self.tasks_events[x]))) == 0,
-                              range(len(self.tasks_events))))
-        if not len(runoffs):
-            raise Exception('System has no runoffs. Data is incorrect')
-        elif len(runoffs) > 1:
-            raise Exception('System has multiple runoffs. Data is incorrect')
-        runoff = runoffs[0]
-
-        sources = list(filter(lambda x: len(list(filter(lambda y: y != -1, np.array(self.tasks_events)[:, x].tolist()))) == 0,
-                              range(self.events_count)))
-        if not len(sources):
-            raise Exception('System has no runoffs. Data is incorrect')
-        elif len(sources) > 1:
-            raise Exception('System has multiple runoffs. Data is incorrect')
-        source = sources[0]
-        return [source, runoff]
+        with self.stage('validation'):
+            report = self.graph.validate()
+        if report['messages']:
+            raise Exception('\n'.join(report['messages']))
+        return [report['sources'][0], report['sinks'][0]]
 
     def calc_determ_net_params(self):
-        mxmzd_paths = self.__floyd_warshall_inv()
-        t_cr = mxmzd_paths[self.source][self.runoff]
+        with self.stage('determ_params'):
+            return self.__calc_determ_net_params()
 
-        t_early = []
-        for i in range(self.events_count):
-            t_early.append(mxmzd_paths[self.source][i])
-        t_early[self.source] = 0
-        t_task_early_start = []
-        for i in self.tasks_start_events:
-            t_task_early_start.append(t_early[i] if i != 0 else 0)
-        t_task_early_end = t_task_early_start.copy()
-        for i in range(len(t_task_early_end)):
-            t_task_early_end[i] += self.task_exp[i]
-
-        t_late = []
-        for i in range(self.events_count):
-            t_late.append(t_cr - mxmzd_paths[i][self.runoff])
-        t_late[self.source] = 0
-        t_late[self.runoff] = t_cr
-        t_task_late_end = []
-        for i in self.tasks_end_events:
-            t_task_late_end.append(t_late[i])
-        t_task_late_start = t_task_late_end.copy()
-        for i in range(len(t_task_late_start)):
-            t_task_late_start[i] -= self.task_exp[i]
-
-        task_full_time_reserve = []
-        for i in range(self.tasks_count):
-            task_full_time_reserve.append(t_late[self.tasks_end_events[i]] -
-                                          t_early[self.tasks_start_events[i]] - self.task_exp[i])
-
-        task_independent_time_reserve = []
-        for i in range(self.tasks_count):
-            task_independent_time_reserve.append(t_early[self.tasks_end_events[i]] -
-                                                 t_late[self.tasks_start_events[i]] - self.task_exp[i])
-
-        task_private_time_reserve_1 = []
-        for i in range(self.tasks_count):
-            task_private_time_reserve_1.append(t_late[self.tasks_end_events[i]] -
-                                               t_late[self.tasks_start_events[i]] - self.task_exp[i])
-
-        task_private_time_reserve_2 = []
-        for i in range(self.tasks_count):
-            task_private_time_reserve_2.append(t_early[self.tasks_end_events[i]] -
-                                               t_early[self.tasks_start_events[i]] - self.task_exp[i])
+    def __calc_determ_net_params(self):
+        t_cr = self.analysis.t_cr
+        t_early = self.analysis.t_early
+        t_late = self.analysis.t_late
+        task_exp = self.analysis.task_exp
+        start_events = self.graph.tasks_start_events
+        end_events = self.graph.tasks_end_events
+
+        t_task_early_start = t_early[start_events]
+        t_task_early_end = t_task_early_start + task_exp
+        t_task_late_end = t_late[end_events]
+        t_task_late_start = t_task_late_end - task_exp
+
+        task_full_time_reserve = t_late[end_events] - t_early[start_events] - task_exp
+        task_independent_time_reserve = t_early[end_events] - t_late[start_events] - task_exp
+        task_private_time_reserve_1 = t_late[end_events] - t_late[start_events] - task_exp
+        task_private_time_reserve_2 = t_early[end_events] - t_early[start_events] - task_exp
 
         return [t_cr, t_early, t_task_early_start, t_task_early_end, t_late,
                 t_task_late_start, t_task_late_end, task_full_time_reserve, task_independent_time_reserve,
                 task_private_time_reserve_1, task_private_time_reserve_2]
 
-    def __floyd_warshall_inv(self):
-        task_exp = self.calc_t_exp()[0]
-        task_net = [[-math.inf for j in range(self.events_count)] for i in range(self.events_count)]
-
-        for i in range(len(self.tasks_events)):
-            for j in range(len(self.tasks_events[i])):
-                if self.tasks_events[i][j] != -1:
-                    task_net[i][j] = task_exp[self.tasks_events[i][j]]
-
-        for k in range(self.events_count):
-            for i in range(self.events_count):
-                for j in range(self.events_count):
-                    if task_net[i][k] > -math.inf and task_net[k][j] > -math.inf:
-                        task_net[i][j] = max(task_net[i][j], task_net[i][k] + task_net[k][j])
-
+    def calc_longest_paths_matrix(self):
+        task_exp = self.analysis.task_exp
+        task_net = np.empty((self.events_count, self.events_count))
+        for i in range(self.events_count):
+            task_net[i] = self.graph.calc_early_times(task_exp, i)
+            task_net[i][i] = -math.inf
         return task_net
 
-    def full_path_founder(self, index, full_paths, end, previous_event=None, prev_events=None,
+    def full_path_founder(self, index, full_paths, end, previous_task=None, prev_events=None,
                           prev_tasks=None, prev_route_task_exp=0, prev_route_dispersion_sum=0):
         if prev_events is None:
             prev_events = []
         if prev_tasks is None:
             prev_tasks = []
         prev_events.append(str(index))
-        if previous_event is not None:
-            prev_tasks.append(str(self.tasks_events[previous_event][index]))
-            prev_route_task_exp += self.task_exp[self.tasks_events[previous_event][index]]
-            prev_route_dispersion_sum += self.dispersion[self.tasks_events[previous_event][index]]
+        if previous_task is not None:
+            prev_tasks.append(str(previous_task))
+            prev_route_task_exp += self.task_exp[previous_task]
+            prev_route_dispersion_sum += self.dispersion[previous_task]
         if index == end:
             full_paths.append(dict({'events': prev_events.copy(), 'tasks': prev_tasks.copy(),
                                     'exp': prev_route_task_exp, 'disp': prev_route_dispersion_sum}))
             return
-        for i in range(len(self.tasks_events[index])):
-            if self.tasks_events[index][i] == -1:
-                continue
-            self.full_path_founder(i, full_paths, end, index, prev_events.copy(), prev_tasks.copy(),
+        for event, task in zip(*self.graph.successors(index)):
+            self.full_path_founder(int(event), full_paths, end, int(task), prev_events.copy(), prev_tasks.copy(),
                                    prev_route_task_exp, prev_route_dispersion_sum)
 
-    def calc_full_path_reserves(self):
-        mxmzd_paths = self.__floyd_warshall_inv()
-        t_cr = mxmzd_paths[self.source][self.runoff]
-        full_paths = []
-        self.full_path_founder(self.source, full_paths, self.runoff)
+    def iter_critical_paths(self, max_reserve=None):
+        # Best-first search over partial source -> event paths keyed by the longest
+        # complete path they can still become (prefix + longest tail), so complete
+        # paths come out ordered by reserve and only the requested ones are built
+        t_cr = self.analysis.t_cr
+        t_tail = self.analysis.t_tail.tolist()
+        task_exp, dispersion = self.analysis.task_exp.tolist(), self.analysis.dispersion.tolist()
+        counter = itertools.count()
+        queue = [(-t_cr, next(counter), self.source, 0, 0, None)]
+        # Profiled between resumptions only: [resumed at, prefixes expanded, peak queue size]
+        stats = None
+        if self.profiler is not None:
+            self.profiler.count('path_enumeration', 'calls')
+            stats = [time.perf_counter(), 0, 0]
+        while queue:
+            if stats is not None:
+                stats[1] += 1
+                stats[2] = max(stats[2], len(queue))
+            bound, _, event, route_exp, route_disp, route = heapq.heappop(queue)
+            if max_reserve is not None and t_cr + bound > max_reserve + TIME_EPSILON:
+                break
+            if event == self.runoff:
+                events, tasks = [event], []
+                while route is not None:
+                    task, route = route
+                    tasks.append(task)
+                    events.append(int(self.graph.tasks_start_events[task]))
+                events.reverse()
+                tasks.reverse()
+                if stats is not None:
+                    self.__record_paths(stats, 1)
+                yield dict({'events': events, 'tasks': tasks, 'exp': route_exp, 'disp': route_disp,
+                            'reserve': t_cr - route_exp})
+                if stats is not None:
+                    stats[0] = time.perf_counter()
+                continue
+            for next_event, task in zip(*self.graph.successors(event)):
+                next_event, task = int(next_event), int(task)
+                heapq.heappush(queue, (-(route_exp + task_exp[task] + t_tail[next_event]), next(counter),
+                                       next_event, route_exp + task_exp[task],
+                                       route_disp + dispersion[task], (task, route)))
+        if stats is not None:
+            self.__record_paths(stats, 0)
+
+    def __record_paths(self, stats, paths):
+        self.profiler.add_time('path_enumeration', time.perf_counter() - stats[0])
+        self.profiler.count('path_enumeration', 'paths_enumerated', paths)
+        self.profiler.count('path_enumeration', 'prefixes_expanded', stats[1])
+        self.profiler.peak('path_enumeration', 'peak_frontier', stats[2])
+        stats[1] = 0
+
+    def find_critical_paths(self, limit=None, max_reserve=None):
+        return list(itertools.islice(self.iter_critical_paths(max_reserve), limit))
+
+    def calc_full_path_reserves(self, limit=1000, max_reserve=None):
         full_reserves_data = []
-        for i in full_paths:
-            full_reserves_data.append({'events': ', '.join(i['events']), 'len': round(t_cr - i['exp'], 2)})
+        for i in self.find_critical_paths(limit, max_reserve):
+            full_reserves_data.append({'events': ', '.join(map(str, i['events'])), 'len': round(i['reserve'], 2)})
         return full_reserves_data
 
+    def calc_events_dispersion(self, mode='max'):
+        return self.analysis.events_dispersion(mode)
 
-    def calc_probabilistic_net_params(self):
-        mxmzd_paths = self.__floyd_warshall_inv()
-        t_cr = mxmzd_paths[self.source][self.runoff]
+    def calc_clark_moments(self):
+        # Mean and variance of events completion times by Clark's approximation
+        return self.analysis.clark_moments
 
-        t_early = []
-        for i in range(self.events_count):
-            t_early.append(mxmzd_paths[self.source][i])
-        t_early[self.source] = 0
+    def calc_probabilistic_net_params(self, dispersion_mode='max'):
+        # In the 'clark' mode probabilities are taken around the Clark mean, which
+        # accounts for merge bias, instead of the early time
+        with self.stage('probabilities'):
+            max_disp = self.calc_events_dispersion(dispersion_mode)
+            return [max_disp, self.calc_events_probabilities(self.analysis.events_mean(dispersion_mode), max_disp)]
 
-        max_disp = []
-        for i in range(self.events_count):
-            paths_to_event = []
-            self.full_path_founder(self.source, paths_to_event, i)
-            paths_to_event.sort(key=lambda x: x['disp'], reverse=True)
-            max_disp.append(paths_to_event[0]['disp'])
-        probabilities = []
-        for i in range(len(max_disp)):
-            if max_disp[i] == 0:
-                probabilities.append(0)
-            else:
-                probabilities.append(st.norm.cdf((self.events_time_limits[i] - t_early[i]) / math.sqrt(max_disp[i]), 0, 1))
-        return [max_disp, probabilities]
+    def calc_events_probabilities(self, t_early, events_dispersion, events_time_limits=None):
+        # Also for a trailing scenarios axis; 0 where the dispersion is 0
+        limits = self.events_time_limits if events_time_limits is None else events_time_limits
+        if np.ndim(limits) == 1:
+            limits = limits.reshape((-1,) + (1,) * (np.ndim(t_early) - 1))
+        known = events_dispersion != 0
+        deviation = np.sqrt(np.where(known, events_dispersion, 1))
+        return np.where(known, norm_cdf((limits - t_early) / deviation), 0)
+
+    def calc_batch_net_params(self, durations, dispersion, dispersion_mode='max', events_time_limits=None):
+        # t_cr, early times, events dispersion and probabilities for a batch of
+        # scenarios: durations and dispersion are (tasks x scenarios), time limits
+        # (events x scenarios) if they differ between scenarios
+        t_early = self.graph.calc_early_times(durations)
+        events_mean = t_early
+        if dispersion_mode == 'max':
+            events_dispersion = self.graph.calc_early_times(dispersion)
+        elif dispersion_mode == 'critical':
+            events_dispersion = self.graph.calc_critical_dispersion(durations, dispersion, t_early)
+        elif dispersion_mode == 'clark':
+            events_mean, events_dispersion = self.graph.calc_clark_moments(durations, dispersion)
+        else:
+            raise Exception('Unknown dispersion mode')
+        return [t_early[self.runoff], t_early, events_dispersion,
+                self.calc_events_probabilities(events_mean, events_dispersion, events_time_limits)]
+
+    def calc_sensitivity(self, estimates=None, step=0.01, dispersion_mode='max', chunk_size=None):
+        # Finite-difference impact of every task estimate on t_cr and on the events
+        # probabilities: for each estimate name ('early', 'late', 'possible'),
+        # 't_cr' is (tasks,) and 'probabilities' is (tasks x events). Column j of a
+        # batch is the network with task j's estimate raised by step, so all tasks
+        # go through the batched passes over one topological order. The raise goes
+        # through unrounded expected times, or steps below the 4 decimals of
+        # calc_expected_times would be lost, and impacts are divided by the raise
+        # actually applied to the estimate
+        if estimates is None:
+            estimates = ['early', 'late', 'possible'] if self.use_3_marks_method else ['early', 'late']
+        if 'possible' in estimates and not self.use_3_marks_method:
+            raise Exception('Most possible estimates are used by the 3 marks method only')
+        task_exp, dispersion = self.analysis.expected_times
+        t_cr = self.analysis.t_cr
+        probabilities = self.calc_probabilistic_net_params(dispersion_mode)[1]
+        chunk_size = chunk_size or max(1, MEMORY_BUDGET // (8 * (3 * self.tasks_count + 4 * self.events_count) or 1))
+
+        estimates_values = {'early': self.tasks_early, 'late': self.tasks_late, 'possible': self.tasks_possible}
+        exact_task_exp, exact_dispersion = calc_expected_times(self.use_3_marks_method, self.tasks_early,
+                                                               self.tasks_late, self.tasks_possible, None)
+        sensitivity = dict()
+        for name in estimates:
+            values = dict(estimates_values)
+            values[name] = values[name] + step
+            applied = values[name] - estimates_values[name]
+            raised_task_exp, raised_dispersion = calc_expected_times(self.use_3_marks_method, values['early'],
+                                                                     values['late'], values['possible'], None)
+            new_task_exp = task_exp + (raised_task_exp - exact_task_exp)
+            new_dispersion = dispersion + (raised_dispersion - exact_dispersion)
+            t_cr_impact = np.zeros(self.tasks_count)
+            probabilities_impact = np.zeros((self.tasks_count, self.events_count))
+            for first in range(0, self.tasks_count, chunk_size):
+                tasks = np.arange(first, min(first + chunk_size, self.tasks_count))
+                columns = np.arange(len(tasks))
+                durations = np.repeat(task_exp[:, None], len(tasks), axis=1)
+                durations[tasks, columns] = new_task_exp[tasks]
+                batch_dispersion = np.repeat(dispersion[:, None], len(tasks), axis=1)
+                batch_dispersion[tasks, columns] = new_dispersion[tasks]
+                batch_t_cr, t_early, events_dispersion, batch_probabilities = \
+                    self.calc_batch_net_params(durations, batch_dispersion, dispersion_mode)
+                t_cr_impact[tasks] = (batch_t_cr - t_cr) / applied[tasks]
+                probabilities_impact[tasks] = (batch_probabilities.T - probabilities) / applied[tasks, None]
+            sensitivity[name] = {'t_cr': t_cr_impact, 'probabilities': probabilities_impact}
+        return sensitivity
+
+    def calc_resource_schedule(self, tasks_resources, capacity):
+        # Start times under one shared resource of the given capacity
+        from scheduler import ResourceScheduler
+        with self.stage('resource_schedule'):
+            return ResourceScheduler(self).schedule(tasks_resources, capacity)
 
+    def calc_monte_carlo_net_params(self, scenarios, seed=None, chunk_size=None, bins=1000, workers=1):
+        from montecarlo import MonteCarloSimulator, ParallelMonteCarlo
+        if workers == 1:
+            return MonteCarloSimulator(self, bins).run(scenarios, seed, chunk_size)
+        return ParallelMonteCarlo(self, workers, bins).run(scenarios, seed, chunk_size)
 
+    def calc_distribution_net_params(self, resolution=32):
+        # Completion time CDFs of every event on a discretized time grid
+        from distengine import DistributionEngine
+        with self.stage('distributions'):
+            return DistributionEngine(self, resolution).run()
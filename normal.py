@@ -0,0 +1,46 @@
+import math
+import numpy as np
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+_SQRT_2 = math.sqrt(2)
+_SQRT_2_PI = math.sqrt(2 * math.pi)
+
+
+def norm_cdf(x):
+    # Standard normal CDF through erfc, which keeps its accuracy deep in the left tail
+    return np.asarray(0.5 * _erfc(-np.asarray(x, dtype=np.float64) / _SQRT_2), dtype=np.float64)[()]
+
+
+def norm_pdf(x):
+    x = np.asarray(x, dtype=np.float64)
+    return np.exp(-0.5 * x * x) / _SQRT_2_PI
+
+
+def clark_max(mean_a, variance_a, mean_b, variance_b, covariance=0):
+    # Mean and variance of max(A, B) for normals A and B by Clark's moment
+    # matching, taken relative to mean_b to keep the variance accurate
+    spread = np.sqrt(np.maximum(variance_a + variance_b - 2 * covariance, 0))
+    known = spread > 0
+    difference = mean_a - mean_b
+    alpha = np.where(known, difference / np.where(known, spread, 1), 0)
+    cdf, cdf_b, pdf = norm_cdf(alpha), norm_cdf(-alpha), norm_pdf(alpha)
+    shift = difference * cdf + spread * pdf
+    second = (difference * difference + variance_a) * cdf + variance_b * cdf_b + difference * spread * pdf
+    # Without spread A - B is constant and the larger one is the max
+    return [mean_b + np.where(known, shift, np.maximum(difference, 0)),
+            np.where(known, np.maximum(second - shift * shift, 0), np.where(difference >= 0, variance_a, variance_b))]
+
+
+def clark_max_scalar(mean_a, variance_a, mean_b, variance_b, covariance=0.0):
+    # clark_max for plain floats, for loops where NumPy calls would dominate
+    spread_2 = variance_a + variance_b - 2 * covariance
+    if spread_2 <= 0:
+        return [mean_a, variance_a] if mean_a >= mean_b else [mean_b, variance_b]
+    spread = math.sqrt(spread_2)
+    difference = mean_a - mean_b
+    alpha = difference / spread
+    cdf, cdf_b = 0.5 * math.erfc(-alpha / _SQRT_2), 0.5 * math.erfc(alpha / _SQRT_2)
+    pdf = math.exp(-0.5 * alpha * alpha) / _SQRT_2_PI
+    shift = difference * cdf + spread * pdf
+    second = (difference * difference + variance_a) * cdf + variance_b * cdf_b + difference * spread * pdf
+    return [mean_b + shift, max(second - shift * shift, 0.0)]
@@ -0,0 +1,65 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+# Shared by every planner without a profiler, entering it costs one call
+DISABLED_STAGE = nullcontext()
+
+
+class StageProfiler:
+    # Wall time and counters per named calculation stage. Stages may nest:
+    # 'seconds' includes the nested stages, 'self_seconds' does not. Counters
+    # are summed over calls, peaks keep the largest value seen
+    def __init__(self):
+        self.stages = dict()
+        self.__running = []
+
+    def __stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = {'calls': 0, 'seconds': 0.0, 'self_seconds': 0.0}
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name):
+        # [started, seconds spent in nested stages]
+        frame = [time.perf_counter(), 0.0]
+        self.__running.append(frame)
+        try:
+            yield self
+        finally:
+            self.__running.pop()
+            self.add_time(name, time.perf_counter() - frame[0], frame[1], 1)
+
+    def add_time(self, name, seconds, nested_seconds=0.0, calls=0):
+        # Also for work that cannot sit inside one with block, like a generator
+        # timed between its resumptions
+        stage = self.__stage(name)
+        stage['calls'] += calls
+        stage['seconds'] += seconds
+        stage['self_seconds'] += seconds - nested_seconds
+        if self.__running:
+            self.__running[-1][1] += seconds
+
+    def count(self, name, counter, value=1):
+        stage = self.__stage(name)
+        stage[counter] = stage.get(counter, 0) + value
+
+    def peak(self, name, counter, value):
+        stage = self.__stage(name)
+        stage[counter] = max(stage.get(counter, value), value)
+
+    def reset(self):
+        self.stages = dict()
+
+    def as_dict(self):
+        return dict((name, dict(stage)) for name, stage in self.stages.items())
+
+    def to_json(self, path=None):
+        text = json.dumps(self.as_dict(), indent=1)
+        if path is not None:
+            try:
+                with open(path, 'w') as file:
+                    file.write(text)
+            except OSError:
+                raise Exception('File not found')
+        return text
@@ -0,0 +1,77 @@
+import numpy as np
+from netgraph import MEMORY_BUDGET
+from netplanner import calc_expected_times
+
+
+class ScenarioEngine:
+    # Evaluates many estimate sets for the topology of one validated planner.
+    # Inputs are (scenarios x tasks) matrices, results are stacked the same way:
+    # (scenarios,) for t_cr, (scenarios x events) and (scenarios x tasks) otherwise.
+    # Scenarios go through the batched passes in chunks, so the topological order
+    # and the per-level relaxations are computed once for all of them
+    def __init__(self, planner):
+        self.planner = planner
+        self.graph = planner.graph
+        self.graph.levels()
+
+    def chunk_size(self, scenarios):
+        per_scenario = 8 * (8 * self.planner.tasks_count + 6 * self.planner.events_count)
+        return max(1, min(scenarios, MEMORY_BUDGET // per_scenario))
+
+    def __as_matrix(self, values, scenarios, width, name):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = np.broadcast_to(values, (scenarios, len(values)))
+        if values.shape != (scenarios, width):
+            raise Exception('%s matrix shape doesnt match' % name)
+        return values
+
+    def run(self, tasks_early, tasks_late, tasks_possible=None, events_time_limits=None,
+            dispersion_mode='max', chunk_size=None):
+        planner, graph = self.planner, self.graph
+        scenarios = len(tasks_early)
+        tasks_early = self.__as_matrix(tasks_early, scenarios, planner.tasks_count, 'Early tasks')
+        tasks_late = self.__as_matrix(tasks_late, scenarios, planner.tasks_count, 'Late tasks')
+        if planner.use_3_marks_method:
+            if tasks_possible is None:
+                raise Exception('Most possible matrix is required by the 3 marks method')
+            tasks_possible = self.__as_matrix(tasks_possible, scenarios, planner.tasks_count, 'Most possible')
+        if events_time_limits is not None:
+            events_time_limits = self.__as_matrix(events_time_limits, scenarios, planner.events_count,
+                                                  'Event time limits')
+
+        results = {'t_cr': np.zeros(scenarios)}
+        for name in ['t_early', 't_late', 'events_dispersion', 'probabilities']:
+            results[name] = np.zeros((scenarios, planner.events_count))
+        for name in ['tasks_expected', 'dispersion', 'full_reserve', 'independent_reserve',
+                     'private_reserve_1', 'private_reserve_2']:
+            results[name] = np.zeros((scenarios, planner.tasks_count))
+
+        start_events, end_events = graph.tasks_start_events, graph.tasks_end_events
+        chunk_size = chunk_size or self.chunk_size(scenarios)
+        for first in range(0, scenarios, chunk_size):
+            chunk = slice(first, min(first + chunk_size, scenarios))
+            # tasks x scenarios from here on
+            task_exp, dispersion = calc_expected_times(planner.use_3_marks_method, tasks_early[chunk].T,
+                                                       tasks_late[chunk].T,
+                                                       tasks_possible[chunk].T if planner.use_3_marks_method
+                                                       else None)
+            t_cr, t_early, events_dispersion, probabilities = planner.calc_batch_net_params(
+                task_exp, dispersion, dispersion_mode, None if events_time_limits is None
+                else events_time_limits[chunk].T)
+            t_late = t_cr - graph.calc_tail_times(task_exp)
+            t_late[planner.source] = 0
+            t_late[planner.runoff] = t_cr
+
+            results['t_cr'][chunk] = t_cr
+            results['t_early'][chunk] = t_early.T
+            results['t_late'][chunk] = t_late.T
+            results['events_dispersion'][chunk] = events_dispersion.T
+            results['probabilities'][chunk] = probabilities.T
+            results['tasks_expected'][chunk] = task_exp.T
+            results['dispersion'][chunk] = dispersion.T
+            results['full_reserve'][chunk] = (t_late[end_events] - t_early[start_events] - task_exp).T
+            results['independent_reserve'][chunk] = (t_early[end_events] - t_late[start_events] - task_exp).T
+            results['private_reserve_1'][chunk] = (t_late[end_events] - t_late[start_events] - task_exp).T
+            results['private_reserve_2'][chunk] = (t_early[end_events] - t_early[start_events] - task_exp).T
+        return results
@@ -0,0 +1,129 @@
+import numpy as np
+import heapq
+from bisect import bisect_left, bisect_right
+
+
+class ResourceTimeline:
+    # Usage of one renewable resource as a step function: usage[i] units are busy
+    # on [times[i], times[i + 1]), the last segment runs to infinity. Segments that
+    # no task can start in any more are dropped by forget_before
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = [0.0]
+        self.usage = [0.0]
+
+    def earliest_start(self, ready, duration, amount):
+        # First time from ready on where amount more units stay available for duration
+        start = max(ready, self.times[0])
+        while True:
+            i = bisect_right(self.times, start) - 1
+            end = start + duration
+            while i < len(self.times) and self.times[i] < end:
+                if self.usage[i] + amount > self.capacity:
+                    start = self.times[i + 1]
+                    break
+                i += 1
+            else:
+                return start
+
+    def __split(self, time):
+        i = bisect_left(self.times, time)
+        if i == len(self.times) or self.times[i] != time:
+            self.times.insert(i, time)
+            self.usage.insert(i, self.usage[i - 1])
+        return i
+
+    def reserve(self, start, duration, amount):
+        first, last = self.__split(start), self.__split(start + duration)
+        for i in range(first, last):
+            self.usage[i] += amount
+        # Neighbouring segments with equal usage are merged, so a fully booked
+        # stretch is skipped in one step however many tasks fill it
+        for i in range(min(last, len(self.times) - 1), max(first, 1) - 1, -1):
+            if self.usage[i] == self.usage[i - 1]:
+                del self.times[i]
+                del self.usage[i]
+
+    def forget_before(self, time):
+        i = bisect_right(self.times, time) - 1
+        if i > 0:
+            del self.times[:i]
+            del self.usage[:i]
+
+
+class ResourceScheduler:
+    # Serial schedule generation for one renewable resource: tasks are taken in
+    # order of (late start, full reserve, id) as soon as every task entering their
+    # start event is scheduled, and each starts at the first moment its event is
+    # reached and the resource has room for it
+    def __init__(self, planner):
+        self.planner = planner
+        self.graph = planner.graph
+
+    def schedule(self, tasks_resources, capacity):
+        planner, graph = self.planner, self.graph
+        tasks_resources = np.asarray(tasks_resources, dtype=np.float64)
+        if len(tasks_resources) != planner.tasks_count:
+            raise Exception('Tasks resources length doesnt match')
+        if (tasks_resources < 0).any():
+            raise Exception('Tasks resources must not be negative')
+        overloaded = np.flatnonzero(tasks_resources > capacity)
+        if len(overloaded):
+            raise Exception('Tasks %s need more resource than available' % ', '.join(map(str, overloaded[:10])))
+
+        determ = planner.calc_determ_net_params()
+        durations = planner.analysis.task_exp.tolist()
+        late_start, full_reserve = determ[5].tolist(), determ[7].tolist()
+        resources = tasks_resources.tolist()
+        start_events = graph.tasks_start_events.tolist()
+        end_events = graph.tasks_end_events.tolist()
+        succ_ptr, succ_tasks = graph.succ_ptr.tolist(), graph.succ_tasks.tolist()
+        waiting = graph.in_degree().tolist()
+
+        event_time = [0.0 for i in range(planner.events_count)]
+        start = [0.0 for i in range(planner.tasks_count)]
+        timeline = ResourceTimeline(capacity)
+        eligible = []
+        ready_times = []
+        ready = [False for i in range(planner.tasks_count)]
+
+        def release(event):
+            for k in range(succ_ptr[event], succ_ptr[event + 1]):
+                task = succ_tasks[k]
+                heapq.heappush(eligible, (late_start[task], full_reserve[task], task))
+                heapq.heappush(ready_times, (event_time[event], task))
+
+        for event in range(planner.events_count):
+            if waiting[event] == 0:
+                release(event)
+        while eligible:
+            task = heapq.heappop(eligible)[2]
+            ready[task] = True
+            begin = event_time[start_events[task]]
+            if resources[task] > 0 and durations[task] > 0:
+                begin = timeline.earliest_start(begin, durations[task], resources[task])
+                timeline.reserve(begin, durations[task], resources[task])
+            start[task] = begin
+            finish = begin + durations[task]
+
+            end = end_events[task]
+            if finish > event_time[end]:
+                event_time[end] = finish
+            waiting[end] -= 1
+            if waiting[end] == 0:
+                release(end)
+
+            # No task left can start before the earliest ready time among the
+            # eligible ones, so the timeline before it is never looked at again
+            while ready_times and ready[ready_times[0][1]]:
+                heapq.heappop(ready_times)
+            if ready_times:
+                timeline.forget_before(ready_times[0][0])
+
+        start = np.array(start)
+        return {
+            'start': start,
+            'finish': start + planner.analysis.task_exp,
+            'events_time': np.array(event_time),
+            't_cr': event_time[planner.runoff]
+        }
@@ -1,5 +1,21 @@
 import numpy as np
 import json
+import struct
+
+# Binary project layout: BINARY_MAGIC, header length (uint64, little endian), JSON
+# header, then every column as raw little endian data starting at a multiple of
+# BINARY_ALIGNMENT. Column offsets in the header count from the data section start
+BINARY_MAGIC = b'NETPLAN\x00'
+BINARY_VERSION = 1
+BINARY_ALIGNMENT = 64
+BINARY_EXTENSION = '.npp'
+
+TASKS_COLUMNS_DTYPES = ['<i8', '<i8', '<f8', '<f8', '<f8', '<f8']
+EVENTS_COLUMNS_DTYPES = ['<f8']
+
+
+def _aligned(offset):
+    return -(-offset // BINARY_ALIGNMENT) * BINARY_ALIGNMENT
 
 
 class Serializer:
@@ -8,19 +24,150 @@ class Serializer:
     def serialize(path, data):
         if not isinstance(data, dict):
             raise Exception('Data has incorrect format')
+        data = dict(Serializer.to_rows(data))
         for i in data:
             if isinstance(data[i], np.ndarray):
                 data[i] = data[i].tolist()
+        # JSON has no infinities, like the limits of imported events without one
+        try:
+            text = json.dumps(data, allow_nan=False)
+        except ValueError:
+            raise Exception('Project has infinite values, save it in the binary (%s) format' % BINARY_EXTENSION)
         try:
-            file = open(path, 'w')
+            with open(path, 'w') as file:
+                file.write(text)
         except OSError:
             raise Exception('File not found')
-        json.dump(data, file)
 
     @staticmethod
     def deserialize(path):
         try:
-            file = open(path)
+            with open(path) as file:
+                return json.load(file)
+        except OSError:
+            raise Exception('File not found')
+
+    @staticmethod
+    def to_columns(data):
+        # Project in the column form: 'tasks_params_columns' are the start event,
+        # end event, optimistic, pessimistic (and most possible) arrays, then the
+        # resource requirements when the project has them; 'event_params_columns'
+        # holds the directive limits
+        if 'tasks_params_columns' in data:
+            return data
+        width = 5 if data['use3mark_system'] else 4
+        tasks = np.array(data['tasks_params_model_data'], dtype=np.float64)
+        events = np.array(data['event_params_model_data'], dtype=np.float64)
+        if not len(tasks):
+            tasks = tasks.reshape(0, width)
+        if not len(events):
+            events = events.reshape(0, 1)
+        if tasks.ndim != 2 or events.ndim != 2 or tasks.shape[1] < width or events.shape[1] < 1:
+            raise Exception('Data has incorrect format')
+        columns = dict((i, data[i]) for i in data if i not in ('tasks_params_model_data', 'event_params_model_data'))
+        columns['tasks_params_columns'] = [tasks[:, i].astype(TASKS_COLUMNS_DTYPES[i])
+                                           for i in range(min(tasks.shape[1], width + 1))]
+        columns['event_params_columns'] = [events[:, 0]]
+        return columns
+
+    @staticmethod
+    def to_rows(data):
+        # Row form, as shown in the parameter tables and stored in JSON files
+        if 'tasks_params_columns' not in data:
+            return data
+        rows = dict((i, data[i]) for i in data if i not in ('tasks_params_columns', 'event_params_columns'))
+        rows['tasks_params_model_data'] = np.column_stack(
+            [np.asarray(i, dtype=np.float64) for i in data['tasks_params_columns']])
+        rows['event_params_model_data'] = np.column_stack(
+            [np.asarray(i, dtype=np.float64) for i in data['event_params_columns']])
+        return rows
+
+    @staticmethod
+    def serialize_binary(path, data):
+        if not isinstance(data, dict):
+            raise Exception('Data has incorrect format')
+        data = Serializer.to_columns(data)
+        header = {
+            'version': BINARY_VERSION,
+            'tasks_quantity': int(data['tasks_quantity']),
+            'events_quantity': int(data['events_quantity']),
+            'use3mark_system': bool(data['use3mark_system']),
+            'resource_capacity': int(data.get('resource_capacity', 0)),
+            'tasks_columns': [],
+            'event_columns': []
+        }
+        arrays = []
+        offset = 0
+        for key, name, dtypes in [('tasks_params_columns', 'tasks_columns', TASKS_COLUMNS_DTYPES),
+                                  ('event_params_columns', 'event_columns', EVENTS_COLUMNS_DTYPES)]:
+            for i, column in enumerate(data[key]):
+                array = np.ascontiguousarray(column, dtype=dtypes[i])
+                header[name].append({'dtype': dtypes[i], 'offset': offset, 'length': len(array)})
+                arrays.append([offset, array])
+                offset = _aligned(offset + array.nbytes)
+
+        header = json.dumps(header).encode('utf-8')
+        data_start = _aligned(len(BINARY_MAGIC) + 8 + len(header))
+        try:
+            with open(path, 'wb') as file:
+                file.write(BINARY_MAGIC + struct.pack('<Q', len(header)) + header)
+                for offset, array in arrays:
+                    file.seek(data_start + offset)
+                    file.write(array.tobytes())
         except OSError:
             raise Exception('File not found')
-        return json.load(file)
\ No newline at end of file
+
+    @staticmethod
+    def is_binary(path):
+        try:
+            with open(path, 'rb') as file:
+                return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+        except OSError:
+            raise Exception('File not found')
+
+    @staticmethod
+    def deserialize_binary(path):
+        # Columns are memory mapped read-only: only the header is parsed, data is
+        # paged in as it is used
+        try:
+            with open(path, 'rb') as file:
+                if file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+                    raise Exception('File is not a binary project')
+                header_length = struct.unpack('<Q', file.read(8))[0]
+                header = json.loads(file.read(header_length).decode('utf-8'))
+        except OSError:
+            raise Exception('File not found')
+        if header['version'] != BINARY_VERSION:
+            raise Exception('Binary project version is not supported')
+
+        data_start = _aligned(len(BINARY_MAGIC) + 8 + header_length)
+
+        def load_column(column):
+            if not column['length']:
+                return np.zeros(0, dtype=column['dtype'])
+            return np.memmap(path, dtype=column['dtype'], mode='r',
+                             offset=data_start + column['offset'], shape=(column['length'],))
+
+        return {
+            'tasks_quantity': header['tasks_quantity'],
+            'events_quantity': header['events_quantity'],
+            'use3mark_system': header['use3mark_system'],
+            'resource_capacity': header.get('resource_capacity', 0),
+            'tasks_params_columns': [load_column(i) for i in header['tasks_columns']],
+            'event_params_columns': [load_column(i) for i in header['event_columns']]
+        }
+
+    @staticmethod
+    def load(path):
+        # Either format, told apart by the magic bytes
+        if Serializer.is_binary(path):
+            return Serializer.deserialize_binary(path)
+        return Serializer.deserialize(path)
+
+    @staticmethod
+    def save(path, data):
+        # Binary when the file has BINARY_EXTENSION, JSON otherwise
+        if path.endswith(BINARY_EXTENSION):
+            Serializer.serialize_binary(path, data)
+        else:
+            Serializer.serialize(path, data)
@@ -2,6 +2,7 @@ import sys
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import *
 import numpy as np
+import itertools
 import math
 
 
@@ -150,4 +151,286 @@ class TableModel(QtCore.QAbstractTableModel):
         self.layoutChanged.emit()
 
     def get_data_matrix(self):
-        return np.array(self.data_matrix, dtype=object)
\ No newline at end of file
+        return np.array(self.data_matrix, dtype=object)
+
+class ColumnarTableModel(QtCore.QAbstractTableModel):
+    # One typed NumPy array per column. Arrays keep spare capacity, so rows are
+    # appended in bulk without reallocating on every insert, and column() hands
+    # out views of the data instead of copies
+
+    def __init__(self, columns=[], header=[], dtypes=None):
+        super(ColumnarTableModel, self).__init__()
+        self.row_count = 0
+        self.column_count = 0
+        self.header = []
+        self.dtypes = []
+        self.__data = []
+        if columns or header:
+            self.add_columns(columns, header, dtypes)
+
+    @classmethod
+    def from_rows(cls, rows, header):
+        # Row lists as stored in project files; missing cells become zeros
+        if isinstance(rows, np.ndarray) and rows.ndim == 2:
+            width = max(len(header), rows.shape[1])
+            matrix = np.zeros((len(rows), width))
+            matrix[:, :rows.shape[1]] = rows
+        else:
+            width = max([len(header)] + [len(row) for row in rows])
+            matrix = np.zeros((len(rows), width))
+            for i, row in enumerate(rows):
+                matrix[i, :len(row)] = [ColumnarTableModel.__to_float(value) for value in row]
+        return cls([matrix[:, i] for i in range(width)], list(header) + list(range(len(header), width)))
+
+    @staticmethod
+    def __to_float(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return float(0)
+
+    @staticmethod
+    def __infer_dtype(values):
+        # Numbers are stored as float64, anything else (path labels) as objects
+        try:
+            np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            return object
+        return np.float64
+
+    def __column_values(self, values, dtype, count):
+        # values converted to dtype and padded with zeros up to count
+        column = np.zeros(count, dtype=dtype)
+        if dtype == np.float64:
+            try:
+                values = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                values = [self.__to_float(value) for value in values]
+        column[:len(values)] = values
+        return column
+
+    def __reserve(self, count):
+        capacity = len(self.__data[0]) if self.__data else 0
+        if count <= capacity:
+            return
+        capacity = max(count, 2 * capacity, 16)
+        for i in range(self.column_count):
+            grown = np.zeros(capacity, dtype=self.dtypes[i])
+            grown[:self.row_count] = self.__data[i][:self.row_count]
+            self.__data[i] = grown
+
+    def column(self, index):
+        return self.__data[index][:self.row_count]
+
+    def float_column(self, index):
+        # No copy for float columns, which are all of the editable ones
+        return self.column(index).astype(np.float64, copy=False)
+
+    def setData(self, index, value, role: int = ...) -> bool:
+        if not index.isValid():
+            return False
+
+        if role == QtCore.Qt.EditRole:
+            if self.dtypes[index.column()] == np.float64:
+                value = self.__to_float(value)
+            self.__data[index.column()][index.row()] = value
+            self.dataChanged.emit(
+                index, index, (QtCore.Qt.EditRole,)
+            )
+        else:
+            return False
+        return True
+
+    def data(self, index, role):
+        if role == Qt.DisplayRole:
+            value = self.__data[index.column()][index.row()]
+            if self.dtypes[index.column()] == np.float64:
+                return round(float(value), 2)
+            try:
+                return round(value, 2)
+            except TypeError:
+                return value
+
+    def rowCount(self, index) -> int:
+        return self.row_count
+
+    def columnCount(self, index) -> int:
+        return self.column_count
+
+    def headerData(self, section, orientation, role):
+        # Views may still ask for sections of the model they showed before
+        if orientation != Qt.Horizontal or role != Qt.DisplayRole or section >= len(self.header):
+            return None
+        return QVariant(self.header[section])
+
+    def add_columns(self, columns, headers=[], dtypes=None, position=None):
+        # Appended at the end unless position is given
+        columns = list(columns) + [[] for i in range(len(headers) - len(columns))]
+        if not columns:
+            return self
+        position = self.column_count if position is None else position
+        dtypes = [np.float64 if np.dtype(dtype).kind in 'biuf' else object
+                  for dtype in dtypes or [self.__infer_dtype(column) for column in columns]]
+        rows_needed = max(len(column) for column in columns)
+        if rows_needed > self.row_count:
+            self.add_rows(rows_needed - self.row_count)
+
+        self.beginInsertColumns(QModelIndex(), position, position + len(columns) - 1)
+        capacity = len(self.__data[0]) if self.__data else self.row_count
+        for i, column in enumerate(columns):
+            self.__data.insert(position + i, self.__column_values(column, dtypes[i], capacity))
+            self.dtypes.insert(position + i, dtypes[i])
+            self.header.insert(position + i, headers[i] if i < len(headers) and headers[i] else self.column_count + i)
+        self.column_count += len(columns)
+        self.endInsertColumns()
+        return self
+
+    def add_column(self, col=[], header=None, position=None):
+        return self.add_columns([col], [header], None, position)
+
+    def add_row(self, row):
+        self.add_rows(1, [row])
+
+    def add_rows(self, quantity, rows=[]):
+        # rows come first, the remaining quantity is filled with zeros
+        quantity = max(quantity, len(rows))
+        if quantity == 0:
+            return self
+        self.beginInsertRows(QModelIndex(), self.row_count, self.row_count + quantity - 1)
+        self.__reserve(self.row_count + quantity)
+        for i in range(self.column_count):
+            values = [row[i] if i < len(row) else 0 for row in rows]
+            self.__data[i][self.row_count:self.row_count + quantity] = \
+                self.__column_values(values, self.dtypes[i], quantity)
+        self.row_count += quantity
+        self.endInsertRows()
+        return self
+
+    def remove_rows(self, first, quantity):
+        if first < 0 or quantity < 0 or first + quantity > self.row_count:
+            raise Exception('No such index')
+        if quantity == 0:
+            return
+        self.beginRemoveRows(QModelIndex(), first, first + quantity - 1)
+        for column in self.__data:
+            column[first:self.row_count - quantity] = column[first + quantity:self.row_count]
+        self.row_count -= quantity
+        self.endRemoveRows()
+
+    def remove_last_row(self, quantity=1):
+        quantity = min(quantity, self.row_count)
+        self.remove_rows(self.row_count - quantity, quantity)
+
+    def remove_row(self, row):
+        self.remove_rows(row, 1)
+
+    def remove_last_column(self):
+        self.remove_column(self.column_count - 1)
+
+    def remove_column(self, col):
+        if col >= self.column_count or col < 0:
+            raise Exception('No such index')
+        self.beginRemoveColumns(QModelIndex(), col, col)
+        del self.__data[col]
+        del self.dtypes[col]
+        del self.header[col]
+        self.column_count -= 1
+        self.endRemoveColumns()
+
+    def flags(self, index: QModelIndex):
+        return QtCore.Qt.ItemIsEditable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def clear(self):
+        self.beginResetModel()
+        self.__data = []
+        self.dtypes = []
+        self.header = []
+        self.row_count = 0
+        self.column_count = 0
+        self.endResetModel()
+
+    def get_data_matrix(self):
+        if not self.column_count:
+            return np.zeros((self.row_count, 0))
+        dtype = np.float64 if all(dtype == np.float64 for dtype in self.dtypes) else object
+        return np.stack([self.column(i) for i in range(self.column_count)], axis=1).astype(dtype)
+
+
+class LazyTableModel(QtCore.QAbstractTableModel):
+    # Read-only model over result columns or a row iterator. Rows are exposed a
+    # batch at a time through canFetchMore/fetchMore as the view scrolls, and
+    # cells are formatted only when the view asks for them. Rows of an iterator
+    # are kept raw and turned into cells by row_formatter
+
+    def __init__(self, header, columns=None, rows=None, source=None, row_formatter=None, batch_size=256):
+        super(LazyTableModel, self).__init__()
+        self.header = list(header)
+        self.column_count = len(self.header)
+        self.batch_size = batch_size
+        self.columns = columns
+        self.rows = list(rows or [])
+        self.source = source
+        self.row_formatter = row_formatter or (lambda row: row)
+        if columns is not None:
+            self.total_count = min(len(column) for column in columns) if columns else 0
+            self.row_count = min(self.total_count, batch_size)
+        else:
+            self.total_count = None
+            self.row_count = len(self.rows)
+
+    def close(self):
+        # Drops the iterator, e.g. before the data it walks over changes
+        self.source = None
+
+    def canFetchMore(self, index):
+        if index.isValid():
+            return False
+        if self.columns is not None:
+            return self.row_count < self.total_count
+        return self.source is not None
+
+    def fetchMore(self, index):
+        if index.isValid():
+            return
+        if self.columns is not None:
+            count = min(self.batch_size, self.total_count - self.row_count)
+        else:
+            self.rows.extend(itertools.islice(self.source, self.row_count + self.batch_size - len(self.rows)))
+            count = len(self.rows) - self.row_count
+            if count < self.batch_size:
+                self.source = None
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.row_count, self.row_count + count - 1)
+        self.row_count += count
+        self.endInsertRows()
+
+    def data(self, index, role):
+        if role == Qt.DisplayRole:
+            if self.columns is not None:
+                value = self.columns[index.column()][index.row()]
+            else:
+                value = self.row_formatter(self.rows[index.row()])[index.column()]
+            if isinstance(value, (float, np.floating)):
+                return round(float(value), 2)
+            if isinstance(value, np.integer):
+                return int(value)
+            return value
+
+    def rowCount(self, index) -> int:
+        if index is not None and index.isValid():
+            return 0
+        return self.row_count
+
+    def columnCount(self, index) -> int:
+        if index is not None and index.isValid():
+            return 0
+        return self.column_count
+
+    def headerData(self, section, orientation, role):
+        if orientation != Qt.Horizontal or role != Qt.DisplayRole or section >= len(self.header):
+            return None
+        return QVariant(self.header[section])
+
+    def flags(self, index: QModelIndex):
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
@@ -0,0 +1,37 @@
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netplanner import NetPlanner
+from netgen import generate_project
+from serializer import Serializer
+
+# Networks the tests run on: the saved test projects and a few small generated
+# ones of every kind, with both mark systems
+PROJECTS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.json')))
+GENERATED = [(kind, 40, seed, marks == 3) for kind in ['layered', 'series-parallel', 'dense-mesh']
+             for seed, marks in [(1, 2), (2, 3)]]
+SAVED = [os.path.basename(i) for i in PROJECTS]
+NETWORKS = SAVED + ['%s-%d-%d-%d' % i for i in GENERATED]
+
+
+def project_data(name):
+    if name.endswith('.json'):
+        return Serializer.to_columns(Serializer.load(os.path.join(os.path.dirname(PROJECTS[0]), name)))
+    kind, events_count, seed, use3mark_system = GENERATED[NETWORKS.index(name) - len(PROJECTS)]
+    return generate_project(kind, events_count, seed, use3mark_system)
+
+
+def load_planner(name):
+    return NetPlanner.from_project_data(project_data(name))
+
+
+def planner_with(planner, early=None, late=None, possible=None):
+    # A fresh planner for the same network with other estimates
+    return NetPlanner(planner.tasks_count, planner.events_count, planner.use_3_marks_method,
+                      planner.tasks_early if early is None else early,
+                      planner.tasks_late if late is None else late,
+                      planner.tasks_start_events, planner.tasks_end_events, planner.events_time_limits,
+                      planner.tasks_possible if possible is None else possible)
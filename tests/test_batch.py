@@ -0,0 +1,22 @@
+import json
+from projects import PROJECTS
+from batch import main
+
+# Batch runs write one JSON line per project; errors, of projects or of the
+# output file, come as lines with an error status and a failing exit code
+
+
+def test_batch_writes_results(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    missing = str(tmp_path / 'missing.json')
+    assert main(PROJECTS + [missing, '-o', str(output), '-j', '2']) == 1
+    results = [json.loads(i) for i in output.read_text().splitlines()]
+    assert [i['file'] for i in results] == PROJECTS + [missing]
+    assert [i['status'] for i in results] == ['ok'] * len(PROJECTS) + ['error']
+    assert main(PROJECTS + ['-o', str(output), '-j', '1']) == 0
+
+
+def test_batch_reports_unwritable_output(tmp_path, capsys):
+    output = str(tmp_path / 'missing' / 'results.jsonl')
+    assert main(PROJECTS + ['-o', output]) == 1
+    assert json.loads(capsys.readouterr().err) == {'file': output, 'status': 'error', 'error': 'File not found'}
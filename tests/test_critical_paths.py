@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, load_planner
+
+# The best-first search must give the paths of a full enumeration in order of
+# reserve; dense meshes have too many paths to enumerate
+ENUMERATED = [i for i in NETWORKS if not i.startswith('dense-mesh')]
+
+
+def all_paths(planner):
+    paths = []
+    planner.full_path_founder(planner.source, paths, planner.runoff)
+    t_cr = planner.calc_determ_net_params()[0]
+    return sorted([(t_cr - i['exp'], [int(k) for k in i['events']], [int(k) for k in i['tasks']], i['disp'])
+                   for i in paths], key=lambda i: i[0])
+
+
+def assert_same_paths(found, expected):
+    # Paths of equal reserve may come in any order
+    assert len(found) == len(expected)
+    np.testing.assert_allclose([i['reserve'] for i in found], [i[0] for i in expected], atol=1e-9)
+    found = sorted((round(i['reserve'], 6), i['tasks'], i['events'], round(i['disp'], 6)) for i in found)
+    expected = sorted((round(i[0], 6), i[2], i[1], round(i[3], 6)) for i in expected)
+    assert found == expected
+
+
+@pytest.mark.parametrize('name', ENUMERATED)
+def test_k_best_paths_match_enumeration(name):
+    planner = load_planner(name)
+    paths = all_paths(planner)
+    assert_same_paths(planner.find_critical_paths(), paths)
+    for limit in [1, 5, 20]:
+        found = planner.find_critical_paths(limit)
+        # The last reserve may be shared by paths left out
+        last = found[-1]['reserve']
+        assert_same_paths([i for i in found if i['reserve'] < last - 1e-9],
+                          [i for i in paths[:limit] if i[0] < last - 1e-9])
+        np.testing.assert_allclose([i['reserve'] for i in found], [i[0] for i in paths[:limit]], atol=1e-9)
+
+
+@pytest.mark.parametrize('name', ENUMERATED)
+def test_max_reserve_cuts_at_reserve(name):
+    planner = load_planner(name)
+    paths = all_paths(planner)
+    for max_reserve in [0, paths[len(paths) // 3][0], paths[-1][0] / 2, paths[-1][0]]:
+        assert_same_paths(planner.find_critical_paths(max_reserve=max_reserve),
+                          [i for i in paths if i[0] <= max_reserve + 1e-9])
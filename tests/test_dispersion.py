@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, load_planner
+
+# The 'max' events dispersion is propagated over the graph in one pass and must
+# be the largest dispersion over every source -> event path
+
+
+def paths_max_dispersion(planner):
+    dispersion = planner.calc_t_exp()[1]
+    best = np.zeros(planner.events_count)
+    stack = [(planner.source, 0.0)]
+    while stack:
+        event, value = stack.pop()
+        best[event] = max(best[event], value)
+        for task in np.nonzero(planner.tasks_start_events == event)[0].tolist():
+            stack.append((int(planner.tasks_end_events[task]), value + dispersion[task]))
+    return best
+
+
+@pytest.mark.parametrize('name', NETWORKS)
+def test_max_dispersion_matches_path_enumeration(name):
+    planner = load_planner(name)
+    np.testing.assert_allclose(planner.calc_events_dispersion('max'), paths_max_dispersion(planner), atol=1e-9)
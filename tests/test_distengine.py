@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, load_planner
+from distengine import DistributionEngine
+from montecarlo import MonteCarloSimulator
+from netgen import generate_planner
+
+# Discretized distributions against a Monte Carlo reference; the largest error
+# over events is checked, not only the mean, as the approximation of merges can
+# be off on single events
+MAX_ERROR = 0.06
+MEAN_ERROR = 0.025
+
+
+@pytest.mark.parametrize('name', NETWORKS)
+def test_events_probabilities_match_monte_carlo(name):
+    planner = load_planner(name)
+    reference = MonteCarloSimulator(planner).run(50000, 1).events_probabilities
+    errors = np.abs(DistributionEngine(planner).run().events_probabilities - reference)
+    assert errors.max() < MAX_ERROR
+    assert errors.mean() < MEAN_ERROR
+
+
+@pytest.mark.parametrize('resolution', [8, 32])
+def test_cdf_stays_in_support(resolution):
+    # Tasks far narrower than the grid step: the grid cells spread past the
+    # events' real support, still no event can finish before all tasks at their
+    # early marks or after all at their late ones
+    planner = generate_planner('layered', 100, 0)
+    result = DistributionEngine(planner, resolution).run()
+    lower = planner.graph.calc_early_times(planner.tasks_early)
+    upper = planner.graph.calc_early_times(planner.tasks_late)
+    for event in range(planner.events_count):
+        assert result.cdf(lower[event] - 1e-9, event) == 0
+        assert result.cdf(upper[event], event) == 1
+        assert lower[event] <= result.quantile(0.5, event) <= upper[event]
+    assert result.cdf(2.4, 3) == 1
@@ -0,0 +1,108 @@
+import csv
+import numpy as np
+import pytest
+from projects import GENERATED, NETWORKS, load_planner
+from importer import ImportedProject
+from convert_project import convert
+from serializer import Serializer
+
+# Imported task exports with their own event labels must give the network they
+# were exported from, whatever chunks the rows are read in
+IMPORTED = [i for i in NETWORKS if not i.endswith('.json')][:2] + ['%s-%d-%d-%d' % GENERATED[-1]]
+
+
+def event_label(event):
+    return 'E-%d' % (event * 7919 % 100003)
+
+
+def export(planner, folder, limits=None):
+    columns = ['start', 'end', 'optimistic', 'pessimistic'] + (['most_likely'] if planner.use_3_marks_method else [])
+    rows = [[event_label(planner.tasks_start_events[i]), event_label(planner.tasks_end_events[i]),
+             planner.tasks_early[i], planner.tasks_late[i]] +
+            ([planner.tasks_possible[i]] if planner.use_3_marks_method else []) for i in range(planner.tasks_count)]
+    tasks_path = str(folder / 'tasks.csv')
+    with open(tasks_path, 'w', newline='') as file:
+        csv.writer(file).writerows([columns] + rows[::-1])
+    if limits is None:
+        return tasks_path, None
+    events_path = str(folder / 'events.csv')
+    with open(events_path, 'w', newline='') as file:
+        csv.writer(file).writerows([['event', 'limit']] + [[event_label(i), limits[i]] for i in range(len(limits))
+                                                            if not np.isinf(limits[i])])
+    return tasks_path, events_path
+
+
+def assert_same_network(project, planner):
+    # Imported events are numbered in the order their labels come in, so
+    # results are compared by label
+    data = project.data
+    index = dict((event_label(i), i) for i in range(planner.events_count))
+    events = [index[i] for i in project.labels.labels]
+    assert data['tasks_quantity'] == planner.tasks_count
+    assert data['events_quantity'] == planner.events_count
+    assert data['use3mark_system'] == planner.use_3_marks_method
+    imported = project.planner()
+    np.testing.assert_array_equal(np.array(events)[imported.tasks_start_events], planner.tasks_start_events[::-1])
+    np.testing.assert_array_equal(np.array(events)[imported.tasks_end_events], planner.tasks_end_events[::-1])
+    assert imported.calc_determ_net_params()[0] == pytest.approx(planner.calc_determ_net_params()[0])
+    np.testing.assert_allclose(imported.calc_determ_net_params()[1], planner.calc_determ_net_params()[1][events])
+    return events
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 7, 1000])
+@pytest.mark.parametrize('name', IMPORTED)
+def test_csv_import_maps_labels_across_chunks(name, chunk_rows, tmp_path):
+    planner = load_planner(name)
+    limits = planner.events_time_limits.copy()
+    limits[::3] = np.inf
+    project = ImportedProject(*export(planner, tmp_path, limits), chunk_rows=chunk_rows)
+    events = assert_same_network(project, planner)
+    np.testing.assert_array_equal(project.data['event_params_columns'][0], limits[events])
+    assert project.labels.to_dict(project.data['event_params_columns'][0])[event_label(1)] == limits[1]
+
+
+def test_parquet_import_matches_csv(tmp_path):
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.csv
+    import pyarrow.parquet
+    planner = load_planner(IMPORTED[-1])
+    tasks_path, events_path = export(planner, tmp_path, planner.events_time_limits)
+    options = pyarrow.csv.ConvertOptions(column_types={'start': pyarrow.string(), 'end': pyarrow.string(),
+                                                       'event': pyarrow.string()})
+    for path in [tasks_path, events_path]:
+        pyarrow.parquet.write_table(pyarrow.csv.read_csv(path, convert_options=options),
+                                    path.replace('.csv', '.parquet'))
+    project = ImportedProject(tasks_path.replace('.csv', '.parquet'), events_path.replace('.csv', '.parquet'),
+                              chunk_rows=5)
+    assert_same_network(project, planner)
+    expected = ImportedProject(tasks_path, events_path).data
+    for actual_column, expected_column in zip(project.data['tasks_params_columns'] +
+                                              project.data['event_params_columns'],
+                                              expected['tasks_params_columns'] + expected['event_params_columns']):
+        np.testing.assert_array_equal(actual_column, expected_column)
+
+
+def test_unknown_event_limit_is_refused(tmp_path):
+    planner = load_planner(IMPORTED[0])
+    tasks_path, events_path = export(planner, tmp_path, planner.events_time_limits)
+    with open(events_path, 'a', newline='') as file:
+        csv.writer(file).writerow(['missing', 1.0])
+    with pytest.raises(Exception, match='Unknown event missing'):
+        ImportedProject(tasks_path, events_path)
+
+
+def test_infinite_limits_are_not_written_to_json(tmp_path):
+    planner = load_planner(IMPORTED[0])
+    limits = planner.events_time_limits.copy()
+    limits[0] = np.inf
+    tasks_path, events_path = export(planner, tmp_path, limits)
+    with pytest.raises(Exception, match='binary'):
+        convert(tasks_path, str(tmp_path / 'project.json'), events_path)
+    assert not (tmp_path / 'project.json').exists()
+    with pytest.raises(Exception, match='infinite'):
+        Serializer.save(str(tmp_path / 'project.json'), ImportedProject(tasks_path, events_path).data)
+
+    convert(tasks_path, str(tmp_path / 'project.npp'), events_path, str(tmp_path / 'labels.csv'))
+    assert np.isinf(Serializer.load(str(tmp_path / 'project.npp'))['event_params_columns'][0]).sum() == 1
+    with open(str(tmp_path / 'labels.csv')) as file:
+        assert next(csv.reader(file)) == ['index', 'event']
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, load_planner, planner_with
+
+# Results updated incrementally after estimate edits must be the ones a fresh
+# planner gives for the edited network
+
+
+def results(planner):
+    determ = planner.calc_determ_net_params()
+    return {
+        'expected': planner.calc_t_exp(),
+        'determ': determ[1:],
+        't_cr': [determ[0]],
+        'max': planner.calc_probabilistic_net_params('max'),
+        'critical': planner.calc_probabilistic_net_params('critical'),
+        'clark': planner.calc_probabilistic_net_params('clark'),
+        'paths': [(i['events'], i['reserve']) for i in planner.find_critical_paths(20)]
+    }
+
+
+def assert_results_equal(actual, expected):
+    for name in expected:
+        if name == 'paths':
+            assert [i[0] for i in actual[name]] == [i[0] for i in expected[name]]
+            np.testing.assert_allclose([i[1] for i in actual[name]], [i[1] for i in expected[name]], atol=1e-9)
+        else:
+            for actual_values, expected_values in zip(actual[name], expected[name]):
+                np.testing.assert_allclose(actual_values, expected_values, rtol=1e-12, atol=1e-9, err_msg=name)
+
+
+def random_edits(planner, rng):
+    tasks = rng.choice(planner.tasks_count, min(3, planner.tasks_count), replace=False)
+    early = (planner.tasks_early[tasks] * rng.uniform(0.5, 1.5, len(tasks))).round(1)
+    late = early + rng.uniform(0, 5, len(tasks)).round(1)
+    possible = ((early + late) / 2).round(1) if planner.use_3_marks_method else None
+    return [tasks, early, late, possible]
+
+
+@pytest.mark.parametrize('name', NETWORKS)
+def test_incremental_update_matches_fresh_planner(name):
+    planner = load_planner(name)
+    results(planner)
+    rng = np.random.default_rng(0)
+    for i in range(3):
+        planner.update_tasks(*random_edits(planner, rng))
+        assert_results_equal(results(planner), results(planner_with(planner)))
+
+
+@pytest.mark.parametrize('name', NETWORKS)
+def test_update_keeps_held_results(name):
+    # Results handed out before an update stay as they were, and cannot be
+    # written into
+    planner = load_planner(name)
+    held = results(planner)
+    kept = results(planner_with(planner))
+    planner.update_tasks(*random_edits(planner, np.random.default_rng(1)))
+    assert_results_equal(held, kept)
+    assert not planner.calc_t_exp()[0].flags.writeable
+    assert not planner.calc_determ_net_params()[1].flags.writeable
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, load_planner
+from montecarlo import MonteCarloSimulator, ParallelMonteCarlo
+
+# Samples depend only on the seed and the chunk layout: a seeded run is
+# repeatable and any number of workers gives the serial result
+SIMULATED = [NETWORKS[1], NETWORKS[3], NETWORKS[-1]]
+
+
+def assert_same_result(actual, expected):
+    for name in ['histogram', 'events_hits', 'critical_counts']:
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name), err_msg=name)
+    assert actual.scenarios_count == expected.scenarios_count
+    assert actual.duration_sum == expected.duration_sum
+    assert actual.duration_squares_sum == expected.duration_squares_sum
+
+
+@pytest.mark.parametrize('name', SIMULATED)
+def test_seeded_run_is_repeatable(name):
+    planner = load_planner(name)
+    first = MonteCarloSimulator(planner).run(3000, 7, chunk_size=700, keep_samples=True)
+    second = MonteCarloSimulator(planner).run(3000, 7, chunk_size=700, keep_samples=True)
+    assert_same_result(first, second)
+    np.testing.assert_array_equal(first.samples, second.samples)
+    other = MonteCarloSimulator(planner).run(3000, 8, chunk_size=700, keep_samples=True)
+    assert not np.array_equal(first.samples, other.samples)
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+@pytest.mark.parametrize('name', SIMULATED)
+def test_parallel_matches_serial(name, workers):
+    planner = load_planner(name)
+    serial = MonteCarloSimulator(planner, bins=200).run(3000, 7, chunk_size=700)
+    assert_same_result(ParallelMonteCarlo(planner, workers, bins=200).run(3000, 7, chunk_size=700), serial)
+    assert_same_result(planner.calc_monte_carlo_net_params(3000, 7, 700, bins=200, workers=workers), serial)
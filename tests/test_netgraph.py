@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, load_planner
+from netgraph import NetGraph
+from netplanner import NetPlanner
+
+# Structure checks of networks before planning, with the messages shown to users
+
+
+def graph(events_count, tasks):
+    return NetGraph(events_count, [i[0] for i in tasks], [i[1] for i in tasks])
+
+
+def test_correct_network_has_no_messages():
+    report = graph(4, [(0, 1), (0, 2), (1, 3), (2, 3)]).validate()
+    assert report['messages'] == []
+    assert report['sources'] == [0] and report['sinks'] == [3]
+    assert report['cycles'] == []
+
+
+def test_every_cycle_is_reported():
+    # Two separate cycles, a loop on one event and events behind a cycle that
+    # are not on one
+    tasks = [(0, 1), (1, 2), (2, 1), (2, 3), (3, 4), (4, 5), (5, 3), (5, 6), (6, 6), (6, 7), (7, 8)]
+    report = graph(9, tasks).validate()
+    assert report['cycles'] == [[1, 2], [3, 4, 5], [6]]
+    assert report['messages'] == ['System has cycles: 1 -> 2 -> 1; 3 -> 4 -> 5 -> 3; 6 -> 6. Data is incorrect']
+
+
+def test_cycles_sharing_events_are_one_group():
+    report = graph(5, [(0, 1), (1, 2), (2, 1), (2, 3), (3, 1), (3, 4)]).validate()
+    assert len(report['cycles']) == 1
+    cycle = report['cycles'][0]
+    assert set(cycle) <= {1, 2, 3}
+
+
+def test_many_cycles_are_cut_short():
+    tasks = [(0, 1)] + [(i, i + 1) for i in range(1, 25, 2)] + [(i + 1, i) for i in range(1, 25, 2)] + \
+        [(i + 1, i + 2) for i in range(1, 24, 2)]
+    report = graph(26, tasks).validate()
+    assert len(report['cycles']) == 12
+    assert report['messages'][-1].endswith('; and 2 more. Data is incorrect')
+
+
+def test_sources_sinks_and_isolated_events():
+    report = graph(6, [(0, 2), (1, 2), (2, 3), (2, 4)]).validate()
+    assert report['messages'] == ['Events 5 have no tasks. Data is incorrect',
+                                  'System has multiple sources: 0, 1. Data is incorrect',
+                                  'System has multiple runoffs: 3, 4. Data is incorrect']
+    report = graph(3, [(0, 1), (1, 2), (2, 0)]).validate()
+    assert report['messages'] == ['System has no sources. Data is incorrect',
+                                  'System has no runoffs. Data is incorrect',
+                                  'System has cycles: 0 -> 1 -> 2 -> 0. Data is incorrect']
+
+
+@pytest.mark.parametrize('name', NETWORKS)
+def test_cycles_in_generated_networks(name):
+    # Tasks going back against a few tasks close cycles; every reported cycle
+    # goes over tasks of the network
+    planner = load_planner(name)
+    reversed_tasks = np.random.default_rng(3).choice(planner.tasks_count, 3, replace=False)
+    back = list(zip(planner.tasks_end_events[reversed_tasks].tolist(),
+                    planner.tasks_start_events[reversed_tasks].tolist()))
+    start_events = np.concatenate([planner.tasks_start_events, [i[0] for i in back]])
+    end_events = np.concatenate([planner.tasks_end_events, [i[1] for i in back]])
+    report = NetGraph(planner.events_count, start_events, end_events).validate()
+    tasks = set(zip(start_events.tolist(), end_events.tolist()))
+    assert report['cycles']
+    for cycle in report['cycles']:
+        assert all((a, b) in tasks for a, b in zip(cycle, cycle[1:] + cycle[:1]))
+    with pytest.raises(Exception, match='System has cycles'):
+        NetPlanner(len(start_events), planner.events_count, False, np.ones(len(start_events)),
+                   np.ones(len(start_events)), start_events, end_events, planner.events_time_limits)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, load_planner, planner_with
+from scenarios import ScenarioEngine
+
+# Every scenario of a batch must give what a fresh planner gives for it alone
+
+
+@pytest.mark.parametrize('mode', ['max', 'critical', 'clark'])
+@pytest.mark.parametrize('name', NETWORKS)
+def test_scenarios_match_planner_per_scenario(name, mode):
+    planner = load_planner(name)
+    rng = np.random.default_rng(1)
+    scenarios = 5
+    early = planner.tasks_early * rng.uniform(0.8, 1.2, (scenarios, planner.tasks_count))
+    late = early + rng.uniform(0, 5, (scenarios, planner.tasks_count))
+    possible = (early + late) / 2 if planner.use_3_marks_method else None
+    limits = planner.events_time_limits * rng.uniform(0.9, 1.1, (scenarios, planner.events_count))
+    batch = ScenarioEngine(planner).run(early, late, possible, limits, mode, chunk_size=2)
+    for scenario in range(scenarios):
+        other = planner_with(planner, early[scenario], late[scenario], None if possible is None else possible[scenario])
+        other.events_time_limits = limits[scenario]
+        t_cr, t_early, t_task_early_start, t_task_early_end, t_late, t_task_late_start, t_task_late_end, \
+            full_reserve, independent_reserve, private_reserve_1, private_reserve_2 = other.calc_determ_net_params()
+        events_dispersion, probabilities = other.calc_probabilistic_net_params(mode)
+        tasks_expected, dispersion = other.calc_t_exp()
+        expected = {'t_cr': t_cr, 't_early': t_early, 't_late': t_late, 'events_dispersion': events_dispersion,
+                    'probabilities': probabilities, 'tasks_expected': tasks_expected, 'dispersion': dispersion,
+                    'full_reserve': full_reserve, 'independent_reserve': independent_reserve,
+                    'private_reserve_1': private_reserve_1, 'private_reserve_2': private_reserve_2}
+        for key, values in expected.items():
+            np.testing.assert_allclose(batch[key][scenario], values, atol=1e-9, err_msg=key)
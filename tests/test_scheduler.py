@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, load_planner
+
+# Schedules under one resource must keep the order of tasks and never use more
+# of the resource than there is
+
+
+@pytest.mark.parametrize('capacity', [1, 3])
+@pytest.mark.parametrize('name', NETWORKS)
+def test_schedule_keeps_precedence_and_capacity(name, capacity):
+    planner = load_planner(name)
+    resources = np.random.default_rng(2).integers(0, capacity + 1, planner.tasks_count)
+    schedule = planner.calc_resource_schedule(resources, capacity)
+    start, finish = schedule['start'], schedule['finish']
+
+    for task in range(planner.tasks_count):
+        entering = np.flatnonzero(planner.tasks_end_events == planner.tasks_start_events[task])
+        assert (start[task] >= finish[entering] - 1e-9).all()
+    assert schedule['t_cr'] == pytest.approx(finish.max())
+
+    busy = (resources > 0) & (finish > start)
+    for time in np.unique(start[busy]):
+        running = busy & (start <= time) & (finish > time + 1e-9)
+        assert resources[running].sum() <= capacity
+
+
+@pytest.mark.parametrize('name', NETWORKS)
+def test_schedule_without_shortage_is_early_start(name):
+    planner = load_planner(name)
+    schedule = planner.calc_resource_schedule(np.ones(planner.tasks_count), planner.tasks_count)
+    determ = planner.calc_determ_net_params()
+    np.testing.assert_allclose(schedule['start'], determ[2], atol=1e-9)
+    assert schedule['t_cr'] == pytest.approx(determ[0])
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, SAVED, load_planner, planner_with
+
+# Sensitivity columns are the batched reruns of the network with one estimate
+# raised; a fresh planner rounds its expected times to 4 decimals, so the raised
+# results only match it to that rounding
+WEIGHTS = {True: {'early': 1/6, 'late': 1/6, 'possible': 4/6}, False: {'early': 0.6, 'late': 0.4}}
+
+
+@pytest.mark.parametrize('name', NETWORKS)
+def test_sensitivity_matches_rerun_per_task(name):
+    planner = load_planner(name)
+    step = 0.5
+    sensitivity = planner.calc_sensitivity(step=step, chunk_size=7)
+    t_cr = planner.calc_determ_net_params()[0]
+    probabilities = planner.calc_probabilistic_net_params()[1]
+    for estimate, impact in sensitivity.items():
+        for task in range(planner.tasks_count):
+            values = {'early': planner.tasks_early.copy(), 'late': planner.tasks_late.copy(),
+                      'possible': planner.tasks_possible.copy()}
+            values[estimate][task] += step
+            other = planner_with(planner, values['early'], values['late'], values['possible'])
+            np.testing.assert_allclose(t_cr + impact['t_cr'][task] * step, other.calc_determ_net_params()[0],
+                                       atol=1e-4)
+            np.testing.assert_allclose(probabilities + impact['probabilities'][task] * step,
+                                       other.calc_probabilistic_net_params()[1], atol=1e-3)
+
+
+@pytest.mark.parametrize('name', SAVED)
+def test_sensitivity_small_step(name):
+    # Steps far below the rounding of expected times still give the derivatives:
+    # t_cr moves by the estimate's weight for critical tasks and not at all for
+    # the others, and probabilities converge as the step shrinks
+    planner = load_planner(name)
+    fine = planner.calc_sensitivity(step=1e-6)
+    small = planner.calc_sensitivity(step=1e-4)
+    critical = np.isclose(planner.calc_determ_net_params()[7], 0, atol=1e-9)
+    for estimate, weight in WEIGHTS[planner.use_3_marks_method].items():
+        t_cr_impact = fine[estimate]['t_cr']
+        np.testing.assert_allclose(t_cr_impact[~critical], 0, atol=1e-6)
+        assert np.all(np.isclose(t_cr_impact[critical], weight, atol=1e-6) | np.isclose(t_cr_impact[critical], 0))
+        assert np.isclose(t_cr_impact, weight, atol=1e-6).any()
+        np.testing.assert_allclose(fine[estimate]['probabilities'], small[estimate]['probabilities'], atol=1e-3)
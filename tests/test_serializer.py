@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from projects import NETWORKS, project_data
+from serializer import Serializer, BINARY_EXTENSION
+
+# Saving and loading a project gives back the same project in either format
+
+
+def assert_same_project(actual, expected):
+    actual, expected = Serializer.to_columns(actual), Serializer.to_columns(expected)
+    for key in ['tasks_quantity', 'events_quantity', 'use3mark_system']:
+        assert actual[key] == expected[key]
+    for key in ['tasks_params_columns', 'event_params_columns']:
+        assert len(actual[key]) == len(expected[key])
+        for actual_column, expected_column in zip(actual[key], expected[key]):
+            np.testing.assert_array_equal(actual_column, expected_column)
+
+
+@pytest.mark.parametrize('extension', [BINARY_EXTENSION, '.json'])
+@pytest.mark.parametrize('name', NETWORKS)
+def test_save_load_round_trip(name, extension, tmp_path):
+    data = project_data(name)
+    path = str(tmp_path / ('project' + extension))
+    Serializer.save(path, data)
+    assert Serializer.is_binary(path) == (extension == BINARY_EXTENSION)
+    assert_same_project(Serializer.load(path), data)
+
+
+def test_binary_round_trip_keeps_resources_and_infinite_limits(tmp_path):
+    data = Serializer.to_columns(project_data(NETWORKS[0]))
+    tasks_count, events_count = data['tasks_quantity'], data['events_quantity']
+    data['tasks_params_columns'] = list(data['tasks_params_columns']) + [np.arange(tasks_count) % 3 + 0.5]
+    data['event_params_columns'] = [np.where(np.arange(events_count) % 2, np.inf, 10.0)]
+    data['resource_capacity'] = 4
+    path = str(tmp_path / ('project' + BINARY_EXTENSION))
+    Serializer.save(path, data)
+    loaded = Serializer.load(path)
+    assert loaded['resource_capacity'] == 4
+    assert_same_project(loaded, data)
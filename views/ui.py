@@ -14,10 +14,10 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_Form(object):
     def setupUi(self, Form):
         Form.setObjectName("Form")
-        Form.resize(675, 591)
+        Form.resize(675, 631)
         self.tabWidget = QtWidgets.QTabWidget(Form)
         self.tabWidget.setEnabled(True)
-        self.tabWidget.setGeometry(QtCore.QRect(10, 10, 651, 571))
+        self.tabWidget.setGeometry(QtCore.QRect(10, 10, 651, 611))
         self.tabWidget.setObjectName("tabWidget")
         self.tab = QtWidgets.QWidget()
         self.tab.setEnabled(True)
@@ -36,14 +36,23 @@ class Ui_Form(object):
         self.mark3SysRadio.setGeometry(QtCore.QRect(260, 470, 191, 23))
         self.mark3SysRadio.setObjectName("mark3SysRadio")
         self.eventsQuantitySpinBox = QtWidgets.QSpinBox(self.tab)
-        self.eventsQuantitySpinBox.setGeometry(QtCore.QRect(190, 450, 48, 26))
+        self.eventsQuantitySpinBox.setGeometry(QtCore.QRect(190, 450, 66, 26))
+        self.eventsQuantitySpinBox.setMaximum(9999999)
         self.eventsQuantitySpinBox.setObjectName("eventsQuantitySpinBox")
         self.label_2 = QtWidgets.QLabel(self.tab)
         self.label_2.setGeometry(QtCore.QRect(30, 480, 131, 17))
         self.label_2.setObjectName("label_2")
         self.tasksQuantitySpinBox = QtWidgets.QSpinBox(self.tab)
-        self.tasksQuantitySpinBox.setGeometry(QtCore.QRect(190, 480, 48, 26))
+        self.tasksQuantitySpinBox.setGeometry(QtCore.QRect(190, 480, 66, 26))
+        self.tasksQuantitySpinBox.setMaximum(9999999)
         self.tasksQuantitySpinBox.setObjectName("tasksQuantitySpinBox")
+        self.label_8 = QtWidgets.QLabel(self.tab)
+        self.label_8.setGeometry(QtCore.QRect(30, 510, 151, 17))
+        self.label_8.setObjectName("label_8")
+        self.resourceCapacitySpinBox = QtWidgets.QSpinBox(self.tab)
+        self.resourceCapacitySpinBox.setGeometry(QtCore.QRect(190, 507, 48, 26))
+        self.resourceCapacitySpinBox.setMaximum(9999)
+        self.resourceCapacitySpinBox.setObjectName("resourceCapacitySpinBox")
         self.label_4 = QtWidgets.QLabel(self.tab)
         self.label_4.setGeometry(QtCore.QRect(400, 10, 151, 17))
         self.label_4.setObjectName("label_4")
@@ -202,6 +211,18 @@ class Ui_Form(object):
         self.saveToFileButton = QtWidgets.QPushButton(self.tab)
         self.saveToFileButton.setGeometry(QtCore.QRect(360, 500, 89, 25))
         self.saveToFileButton.setObjectName("saveToFileButton")
+        self.calcProgressBar = QtWidgets.QProgressBar(self.tab)
+        self.calcProgressBar.setGeometry(QtCore.QRect(30, 535, 421, 23))
+        self.calcProgressBar.setProperty("value", 0)
+        self.calcProgressBar.setObjectName("calcProgressBar")
+        self.cancelCalcButton = QtWidgets.QPushButton(self.tab)
+        self.cancelCalcButton.setEnabled(False)
+        self.cancelCalcButton.setGeometry(QtCore.QRect(490, 534, 121, 25))
+        self.cancelCalcButton.setObjectName("cancelCalcButton")
+        self.statusLabel = QtWidgets.QLabel(self.tab)
+        self.statusLabel.setGeometry(QtCore.QRect(30, 562, 581, 17))
+        self.statusLabel.setText("")
+        self.statusLabel.setObjectName("statusLabel")
         self.tasksParamsTable = QtWidgets.QTableView(self.tab)
         self.tasksParamsTable.setGeometry(QtCore.QRect(30, 40, 361, 401))
         self.tasksParamsTable.setObjectName("tasksParamsTable")
@@ -259,10 +280,12 @@ class Ui_Form(object):
         self.label_3.setText(_translate("Form", "Параметры работ"))
         self.mark3SysRadio.setText(_translate("Form", "Трехоценочная система"))
         self.label_2.setText(_translate("Form", "Количество работ"))
+        self.label_8.setText(_translate("Form", "Мощность ресурса"))
         self.label_4.setText(_translate("Form", "Параметры событий"))
         self.startCalcButton.setText(_translate("Form", "Рассчитать "))
         self.loadFromFileButton.setText(_translate("Form", "Загрузить"))
         self.saveToFileButton.setText(_translate("Form", "Сохранить"))
+        self.cancelCalcButton.setText(_translate("Form", "Отмена"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab), _translate("Form", "Параметры"))
         self.label_5.setText(_translate("Form", "Параметры событий"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_2), _translate("Form", "События"))
@@ -1,17 +1,25 @@
 from views.ui import Ui_Form
 from PyQt5 import QtWidgets, QtCore
-from tablemodel import TableModel
+from tablemodel import ColumnarTableModel, LazyTableModel
 from serializer import Serializer
 from netplanner import NetPlanner
+from calcworker import CalculationWorker
+from profiler import StageProfiler
 from PyQt5.QtGui import QIcon, QPixmap
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-import random as rand
-import math
-import os
-import string
-matplotlib.use('Agg')
+
+# Profiled stages shown in the status line, in calculation order
+PROFILE_TITLES = [
+    ('validation', 'проверка'),
+    ('incremental_update', 'обновление'),
+    ('expected_times', 'ожид. времена'),
+    ('longest_paths', 'пути'),
+    ('determ_params', 'параметры'),
+    ('path_enumeration', 'перебор путей'),
+    ('probabilities', 'вероятности'),
+    ('resource_schedule', 'ресурсы'),
+    ('gantt', 'Гант')
+]
 
 
 class Window(QtWidgets.QMainWindow):
@@ -28,14 +36,31 @@ class Window(QtWidgets.QMainWindow):
         self.ui.eventsParamsTable.verticalHeader().setVisible(True)
         self.ui.mark3SysRadio.toggled.connect(lambda: self.method_changed(self.ui.mark3SysRadio))
         self.ui.startCalcButton.clicked.connect(lambda: self.calculate_indicators())
-        self.setup_data()
+        self.ui.resourceCapacitySpinBox.valueChanged.connect(lambda: self.resource_capacity_changed())
+        self.ui.cancelCalcButton.clicked.connect(lambda: self.cancel_calculation())
+        self.thread_pool = QtCore.QThreadPool()
+        self.thread_pool.setMaxThreadCount(1)
+        self.worker = None
+        # Started workers by their signals, [worker, announce]; kept alive until
+        # their last signal is handled, even when cancelled and replaced
+        self.workers = dict()
+        self.planner = None
         self.previous_calculated_flag = False
+        self.setup_data()
 
     def method_changed(self, button):
+        # The most possible estimate goes right after the pessimistic one. The
+        # planner was built for the other method and its columns, so edits wait
+        # for a new calculation
+        self.stop_calculation()
+        self.planner = None
         if button.isChecked():
-            self.ui.tasksParamsTable.model().add_column([], 'Вероятное')
+            self.ui.tasksParamsTable.model().add_column([], 'Вероятное', 4)
         else:
-            self.ui.tasksParamsTable.model().remove_last_column()
+            self.ui.tasksParamsTable.model().remove_column(4)
+
+    def resources_column(self):
+        return 5 if self.ui.mark3SysRadio.isChecked() else 4
 
     def tasks_quantity_changed(self):
         old_tasks_quantity = self.ui.tasksParamsTable.model().row_count
@@ -56,23 +81,38 @@ class Window(QtWidgets.QMainWindow):
             self.ui.eventsParamsTable.model().remove_last_row(abs(delta_count))
 
     def setup_data(self, event_params_model_data=[], tasks_params_model_data=[],
-                   tasks_quantity=0, events_quantity=0, use3mark_system=False):
+                   tasks_quantity=0, events_quantity=0, use3mark_system=False, resource_capacity=0):
+        self.stop_calculation()
         events_params_title = ['Нач. событие', 'Кон. событие', 'Оптим.', 'Пессим.']
         if use3mark_system:
             events_params_title.append('Наиб. вероятное')
-        self.ui.tasksParamsTable.setModel(TableModel(tasks_params_model_data, events_params_title))
-        self.ui.eventsParamsTable.setModel(TableModel(event_params_model_data,
-                                                      ['Директ. срок']))
-        self.ui.timeReservesTable.setModel(TableModel([], ['Номера событий', 'Полный резерв времени']))
+        events_params_title.append('Ресурс')
+        self.planner = None
+        self.ui.tasksParamsTable.setModel(ColumnarTableModel.from_rows(tasks_params_model_data,
+                                                                       events_params_title))
+        self.ui.eventsParamsTable.setModel(ColumnarTableModel.from_rows(event_params_model_data,
+                                                                        ['Директ. срок']))
+        self.ui.tasksParamsTable.model().dataChanged.connect(self.task_params_edited)
+        self.ui.eventsParamsTable.model().dataChanged.connect(self.event_params_edited)
+        self.ui.timeReservesTable.setModel(LazyTableModel(['Номера событий', 'Полный резерв времени']))
         self.ui.timeReservesTable.resizeColumnsToContents()
-        self.ui.eventsResultsTable.setModel(TableModel([], []))
-        self.ui.tasksResultsTable.setModel(TableModel([], []))
-        self.ui.tasksQuantitySpinBox.setValue(tasks_quantity)
-        self.ui.eventsQuantitySpinBox.setValue(events_quantity)
+        self.ui.eventsResultsTable.setModel(LazyTableModel([]))
+        self.ui.tasksResultsTable.setModel(LazyTableModel([]))
+        # A value above the maximum would be clamped and cut the loaded rows
+        for spin_box, quantity in [(self.ui.tasksQuantitySpinBox, tasks_quantity),
+                                   (self.ui.eventsQuantitySpinBox, events_quantity)]:
+            spin_box.setMaximum(max(spin_box.maximum(), quantity))
+            spin_box.setValue(quantity)
+        self.ui.resourceCapacitySpinBox.setValue(resource_capacity)
+        # The table already has the columns of the loaded method
+        self.ui.mark2SysRadio.blockSignals(True)
+        self.ui.mark3SysRadio.blockSignals(True)
         if use3mark_system:
             self.ui.mark3SysRadio.setChecked(True)
         else:
             self.ui.mark2SysRadio.setChecked(True)
+        self.ui.mark2SysRadio.blockSignals(False)
+        self.ui.mark3SysRadio.blockSignals(False)
 
     def save_to_file(self):
         try:
@@ -83,76 +123,26 @@ class Window(QtWidgets.QMainWindow):
             save_data['tasks_quantity'] = self.ui.tasksQuantitySpinBox.value()
             save_data['events_quantity'] = self.ui.eventsQuantitySpinBox.value()
             save_data['use3mark_system'] = True if self.ui.mark3SysRadio.isChecked() else False
-            Serializer.serialize(save_file_path, save_data)
+            save_data['resource_capacity'] = self.ui.resourceCapacitySpinBox.value()
+            Serializer.save(save_file_path, save_data)
         except OSError:
             QtWidgets.QMessageBox.critical(self, 'Error', 'Во время сохранения файла произошла ошибка')
 
     def load_from_file(self):
         try:
             load_file_path = QtWidgets.QFileDialog.getOpenFileName(self, 'Save file...', './')[0]
-            loaded_data = Serializer.deserialize(load_file_path)
+            loaded_data = Serializer.to_rows(Serializer.load(load_file_path))
             self.setup_data(
                 loaded_data['event_params_model_data'],
                 loaded_data['tasks_params_model_data'],
                 loaded_data['tasks_quantity'],
                 loaded_data['events_quantity'],
-                loaded_data['use3mark_system']
+                loaded_data['use3mark_system'],
+                loaded_data.get('resource_capacity', 0)
             )
         except OSError:
             QtWidgets.QMessageBox.critical(self, 'Error', 'Произошла ошибка во время открытия файла')
 
-    def draw_plot(self, tasks):
-        fig, gnt = plt.subplots()
-
-        y_lim = 100
-        x_lim = max([float(t['len']) + float(t['start_time']) for t in tasks])
-
-        gnt.set_ylim(0, y_lim)
-        gnt.set_xlim(0, x_lim)
-
-        gnt.set_xlabel('Time')
-        gnt.set_ylabel('Tasks')
-
-        gnt.grid(True)
-
-        available_colors = [
-            'tab:blue',
-            'tab:orange',
-            'tab:green',
-            'tab:red',
-            'tab:purple',
-            'tab:brown',
-            'tab:pink',
-            'tab:gray',
-            'tab:olive',
-            'tab:cyan',
-        ]
-
-        tasks.sort(key=lambda x: (x['start_event'], x['term_event']))
-
-        spacing = math.floor(y_lim / len(tasks))
-        position = [(spacing * int(i/spacing), spacing - 2) for i in range(y_lim) if i % spacing == 0]
-        y_ticks = [(int(i/spacing) + 0.5) * spacing - 1 for i in range(y_lim - 1) if i % spacing == 0]
-
-        x_step = int(x_lim / 10) if int(x_lim / 10) >= 3 else 1
-        x_ticks = [i for i in range(math.ceil(x_lim)) if i % x_step == 0]
-
-        gnt.set_yticks(y_ticks)
-        gnt.set_xticks(x_ticks)
-
-        y_labels = []
-        for i in range(len(tasks)):
-            gnt.broken_barh([(tasks[i]['start_time'], tasks[i]['len'])], position[i],
-                            facecolors=(rand.choice(available_colors)))
-            y_labels.append('%s-%s' % (str(tasks[i]['start_event']), str(tasks[i]['term_event'])))
-        gnt.set_yticklabels(y_labels)
-
-        filename = './plots/' + ''.join([rand.choice(string.ascii_lowercase) for i in range(10)]) + '.png'
-        if not os.path.exists(os.path.dirname(filename)):
-            os.mkdir(os.path.dirname(filename))
-        plt.savefig(filename)
-        return filename
-
     def calculate_indicators(self):
         if self.previous_calculated_flag:
             resp = QtWidgets.QMessageBox.question(self, 'Очистить вычисления',
@@ -160,53 +150,153 @@ class Window(QtWidgets.QMainWindow):
                                                   QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
             if resp == QtWidgets.QMessageBox.No:
                 return
-            else:
-                self.ui.eventsResultsTable.model().clear()
-                self.ui.tasksResultsTable.model().clear()
         try:
-            tasks_params = self.ui.tasksParamsTable.model().get_data_matrix()
-            events_params = self.ui.eventsParamsTable.model().get_data_matrix()
-            possible_params = (tasks_params[:, 4]).T.tolist() if self.ui.mark3SysRadio.isChecked() else None
+            # Column views go straight to NetPlanner, which copies what it keeps
+            tasks_params = self.ui.tasksParamsTable.model()
+            events_params = self.ui.eventsParamsTable.model()
+            possible_params = tasks_params.float_column(4) if self.ui.mark3SysRadio.isChecked() else None
 
-            start_events = [int(x) for x in tasks_params[:, 0].tolist()]
-            term_events = [int(x) for x in tasks_params[:, 1].tolist()]
+            start_events = tasks_params.column(0).astype(np.int64)
+            term_events = tasks_params.column(1).astype(np.int64)
         except Exception:
             QtWidgets.QMessageBox.critical(self, 'Ошибка', 'Произошла ошибка при считывании параметров.'
                                                            ' Проверьте ошибки и попробуйте заново', QtWidgets.QMessageBox.Close)
             return
         try:
-            planner = NetPlanner(self.ui.tasksQuantitySpinBox.value(),
-                                 self.ui.eventsQuantitySpinBox.value(),
-                                 self.ui.mark3SysRadio.isChecked(),
-                                 tasks_params[:, 2].tolist(),
-                                 tasks_params[:, 3].tolist(),
-                                 start_events,
-                                 term_events,
-                                 events_params[:, 0].tolist(),
-                                 possible_params
-                                 )
-            tasks_expected, dispersion = planner.calc_t_exp()
-            t_cr, t_early, t_task_early_start, t_task_early_end, t_late, \
-            t_task_late_start, t_task_late_end, task_full_time_reserve, task_independent_time_reserve, \
-            task_private_time_reserve_1, task_private_time_reserve_2 = planner.calc_determ_net_params()
-            full_reserves_data = planner.calc_full_path_reserves()
-            events_dispersion, probabilities = planner.calc_probabilistic_net_params()
-        except Exception:
-            QtWidgets.QMessageBox.critical(self, 'Ошибка', 'Произошла ошибка при вычислении результатов',
+            self.planner = NetPlanner(self.ui.tasksQuantitySpinBox.value(),
+                                      self.ui.eventsQuantitySpinBox.value(),
+                                      self.ui.mark3SysRadio.isChecked(),
+                                      tasks_params.float_column(2),
+                                      tasks_params.float_column(3),
+                                      start_events,
+                                      term_events,
+                                      events_params.float_column(0),
+                                      possible_params,
+                                      StageProfiler()
+                                      )
+        except Exception as e:
+            # Validation messages list every structural problem of the network
+            self.planner = None
+            QtWidgets.QMessageBox.critical(self, 'Ошибка', 'Произошла ошибка при вычислении результатов\n' + str(e),
                                   QtWidgets.QMessageBox.Close)
             return
+        self.start_calculation(announce=True)
+
+    def start_calculation(self, announce=False):
+        # announce: the first calculation reports success and unlocks the result
+        # tabs, refreshes after edits only update the tables
+        self.stop_calculation()
+        worker = CalculationWorker(self.planner,
+                                   self.ui.tasksParamsTable.model().float_column(self.resources_column()).copy(),
+                                   self.ui.resourceCapacitySpinBox.value())
+        worker.setAutoDelete(False)
+        worker.signals.progress.connect(self.calculation_progress)
+        worker.signals.finished.connect(self.calculation_finished)
+        worker.signals.failed.connect(self.calculation_failed)
+        worker.signals.cancelled.connect(self.calculation_cancelled)
+        self.workers[worker.signals] = [worker, announce]
+        self.worker = worker
+        self.set_calculation_running(True)
+        self.thread_pool.start(worker)
+
+    def cancel_calculation(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def stop_calculation(self):
+        # Planner data must not change under a running worker, nor under the
+        # paths iterator of the time reserves table
+        if isinstance(self.ui.timeReservesTable.model(), LazyTableModel):
+            self.ui.timeReservesTable.model().close()
+        if self.worker is not None:
+            self.worker.cancel()
+            self.thread_pool.waitForDone()
+            self.worker = None
+            self.set_calculation_running(False)
+
+    def set_calculation_running(self, running):
+        self.ui.startCalcButton.setEnabled(not running)
+        self.ui.cancelCalcButton.setEnabled(running)
+        if running:
+            self.ui.calcProgressBar.setValue(0)
+
+    def finished_worker(self):
+        # [worker, announce] of the worker whose last signal is being handled
+        return self.workers.pop(self.sender(), [None, False])
+
+    def calculation_progress(self, stage, percent):
+        if self.worker is None or self.sender() is not self.worker.signals:
+            return
+        self.ui.calcProgressBar.setValue(percent)
+        self.ui.statusLabel.setText(stage)
+
+    def calculation_finished(self, results):
+        worker, announce = self.finished_worker()
+        if worker is None or worker is not self.worker:
+            return
+        self.worker = None
+        self.set_calculation_running(False)
+        if not self.show_results(results):
+            return
+        self.show_profile()
+        if not announce:
+            return
+
+        QtWidgets.QMessageBox.information(self, 'Успешно',
+                                          'Расчет успешно произведен. Результаты на вкладках "СОБЫТИЯ" и "РАБОТЫ"')
+        self.ui.tab_2.setEnabled(True)
+        self.ui.tab_3.setEnabled(True)
+        self.ui.tab_4.setEnabled(True)
+        self.ui.ganttTab.setEnabled(True)
+        self.previous_calculated_flag = True
+
+    def show_profile(self):
+        # Own time of every stage, the full profile is in the tooltip
+        stages = self.planner.profiler.as_dict()
+        parts = ['%s %.3f' % (title, stages[name]['self_seconds']) for name, title in PROFILE_TITLES
+                 if name in stages]
+        total = sum(i['self_seconds'] for i in stages.values())
+        self.ui.statusLabel.setText('Готово за %.3f с: %s' % (total, ', '.join(parts)))
+        self.ui.statusLabel.setToolTip(self.planner.profiler.to_json())
+
+    def calculation_failed(self, message):
+        worker = self.finished_worker()[0]
+        if worker is None or worker is not self.worker:
+            return
+        self.worker = None
+        self.set_calculation_running(False)
+        self.ui.statusLabel.setText('')
+        QtWidgets.QMessageBox.critical(self, 'Ошибка', 'Произошла ошибка при вычислении результатов\n' + message,
+                                       QtWidgets.QMessageBox.Close)
+
+    def calculation_cancelled(self):
+        worker = self.finished_worker()[0]
+        if worker is None or worker is not self.worker:
+            return
+        self.worker = None
+        self.set_calculation_running(False)
+        self.ui.statusLabel.setText('Расчет отменен')
+
+    def show_results(self, results):
+        planner = self.planner
+        tasks_expected, dispersion = results['tasks_expected'], results['dispersion']
+        t_cr, t_early, t_task_early_start, t_task_early_end, t_late, \
+        t_task_late_start, t_task_late_end, task_full_time_reserve, task_independent_time_reserve, \
+        task_private_time_reserve_1, task_private_time_reserve_2 = results['determ']
+        events_dispersion, probabilities = results['events_dispersion'], results['probabilities']
 
         try:
-            for i in {
-                'Tdir': events_params[:, 0].T.tolist(),
+            events_columns = {
+                'Tdir': planner.events_time_limits.copy(),
                 'Tp': t_early,
                 'Tп': t_late,
                 'Dp': events_dispersion,
                 'P(Tp < Td)': probabilities
-            }.items():
-                self.ui.eventsResultsTable.model().add_column(i[1], i[0])
+            }
+            self.ui.eventsResultsTable.setModel(LazyTableModel(list(events_columns.keys()),
+                                                               list(events_columns.values())))
 
-            for i in {
+            tasks_columns = {
                 'Tож': tasks_expected,
                 'Dож': dispersion,
                 'Tрн': t_task_early_start,
@@ -217,37 +307,73 @@ class Window(QtWidgets.QMainWindow):
                 'P\'': task_private_time_reserve_1,
                 'P\'\'': task_private_time_reserve_2,
                 'Pнезав': task_independent_time_reserve
-            }.items():
-                self.ui.tasksResultsTable.model().add_column(i[1], i[0])
-
-            for i in full_reserves_data:
-                self.ui.timeReservesTable.model().add_row([i['events'], i['len']])
-
-            tasks_properties = []
-            for i in range(self.ui.tasksQuantitySpinBox.value()):
-                if tasks_expected[i] != 0:
-                    tasks_properties.append({'start_event': start_events[i], 'term_event': term_events[i],
-                                            'start_time': t_task_early_start[i], 'len': tasks_expected[i]})
-            file_diagram = self.draw_plot(tasks_properties)
-
-            pixmap = QPixmap(file_diagram)
-            self.ui.imgLabel.setPixmap(pixmap)
-            self.ui.imgLabel.resize(pixmap.width(), pixmap.height())
+            }
+            if results['schedule'] is not None:
+                tasks_columns['Tрн (ресурс)'] = results['schedule']['start']
+                tasks_columns['Tро (ресурс)'] = results['schedule']['finish']
+            self.ui.tasksResultsTable.setModel(LazyTableModel(list(tasks_columns.keys()),
+                                                              list(tasks_columns.values())))
+
+            # Paths past the first page are enumerated only when scrolled to
+            self.ui.timeReservesTable.setModel(LazyTableModel(['Номера событий', 'Полный резерв времени'],
+                                                              rows=results['paths'],
+                                                              source=results['paths_source'],
+                                                              row_formatter=lambda path: [
+                                                                  ', '.join(map(str, path['events'])),
+                                                                  path['reserve']]))
+            self.ui.timeReservesTable.resizeColumnsToContents()
+
+            pixmap = QPixmap()
+            if pixmap.loadFromData(results['gantt'], 'PNG'):
+                self.ui.imgLabel.setPixmap(pixmap)
+                self.ui.imgLabel.resize(pixmap.width(), pixmap.height())
         except Exception:
             QtWidgets.QMessageBox.critical(self, 'Ошибка', 'Произошла ошибка при выводе результатов',
                                   QtWidgets.QMessageBox.Close)
-            return
-
-        QtWidgets.QMessageBox.information(self, 'Успешно',
-                                          'Расчет успешно произведен. Результаты на вкладках "СОБЫТИЯ" и "РАБОТЫ"')
-        self.ui.tab_2.setEnabled(True)
-        self.ui.tab_3.setEnabled(True)
-        self.ui.tab_4.setEnabled(True)
-        self.ui.ganttTab.setEnabled(True)
-        self.previous_calculated_flag = True
-
-
-
+            return False
+        return True
 
+    def task_params_edited(self, top_left, bottom_right):
+        # Estimates edited after a calculation refresh the results incrementally;
+        # changed start/end events need a new calculation
+        if self.planner is None or not self.previous_calculated_flag or top_left.column() < 2:
+            return
+        rows = [i for i in range(top_left.row(), bottom_right.row() + 1) if i < self.planner.tasks_count]
+        if not rows:
+            return
+        self.stop_calculation()
+        # After edits only the refresh is profiled
+        self.planner.profiler.reset()
+        try:
+            tasks_params = self.ui.tasksParamsTable.model()
+            self.planner.update_tasks(rows,
+                                      early=tasks_params.float_column(2)[rows],
+                                      late=tasks_params.float_column(3)[rows],
+                                      possible=tasks_params.float_column(4)[rows]
+                                      if self.planner.use_3_marks_method else None)
+        except Exception:
+            return
+        self.start_calculation()
 
+    def resource_capacity_changed(self):
+        if self.planner is None or not self.previous_calculated_flag:
+            return
+        self.stop_calculation()
+        self.planner.profiler.reset()
+        self.start_calculation()
 
+    def event_params_edited(self, top_left, bottom_right):
+        if self.planner is None or not self.previous_calculated_flag:
+            return
+        rows = [i for i in range(top_left.row(), bottom_right.row() + 1) if i < self.planner.events_count]
+        if not rows:
+            return
+        self.stop_calculation()
+        # After edits only the refresh is profiled
+        self.planner.profiler.reset()
+        try:
+            events_params = self.ui.eventsParamsTable.model()
+            self.planner.events_time_limits[rows] = events_params.float_column(0)[rows]
+        except Exception:
+            return
+        self.start_calculation()